@@ -6,12 +6,34 @@ Examines the left border of the image and tests the removal function.
 
 import sys
 from pathlib import Path
+import numpy as np
 from PIL import Image
-import statistics
 
 # Import border removal functions
 sys.path.insert(0, str(Path(__file__).parent))
-from notecard_extractor.image_processing import autocrop_grey_border
+from notecard_extractor.image_processing import (
+    autocrop_grey_border,
+    compute_column_margin_ratios,
+)
+
+# Column positions sampled when looking for where content starts
+CHECK_COLUMNS = (0, 10, 20, 50, 100, 150, 200, 300, 400, 500)
+
+
+def channel_stats(samples: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compute per-channel mean and sample variance over the first axis.
+
+    All channels (and, for a (samples, columns, 3) block, all columns) are
+    handled in the same pass over one float64 copy of the samples.
+    """
+    values = samples.astype(np.float64)
+    mean = values.mean(axis=0)
+    if len(values) < 2:
+        return mean, np.zeros_like(mean)
+    centered = values - mean
+    variance = np.einsum("i...,i...->...", centered, centered) / (len(values) - 1)
+    return mean, variance
 
 
 def analyze_left_border(image_path: Path):
@@ -20,12 +42,11 @@ def analyze_left_border(image_path: Path):
     print(f"Analyzing: {image_path.name}")
     print(f"{'=' * 60}\n")
 
+    # Only the scanned strip is converted to RGB; the border scans below
+    # convert the lines they read themselves
     image = Image.open(image_path)
-    if image.mode != "RGB":
-        image = image.convert("RGB")
 
     width, height = image.size
-    pixels = image.load()
 
     print(f"Image size: {width}x{height} pixels\n")
 
@@ -38,34 +59,39 @@ def analyze_left_border(image_path: Path):
     print(f"Sampling left edge (first {sample_width} pixels)")
     print(f"Excluding top/bottom {edge_exclusion}px\n")
 
+    # Bulk-read the scanned strip once as an (H, W, 4) RGBA uint8 array; every
+    # sample below is a slice of it. Row 0 of the strip is scan_y_start and
+    # it extends far enough right to cover the checked columns. The padding
+    # byte lets the margin check match pixels as single uint32 values.
+    strip_width = min(width, max(CHECK_COLUMNS) + 1)
+    strip_height = max(0, scan_y_end - scan_y_start)
+    strip_image = image.crop(
+        (0, scan_y_start, strip_width, scan_y_start + strip_height)
+    )
+    if strip_image.mode != "RGB":
+        strip_image = strip_image.convert("RGB")
+    strip_rgba = np.frombuffer(
+        strip_image.convert("RGBA").tobytes(), dtype=np.uint8
+    ).reshape(strip_height, strip_width, 4)
+    strip = strip_rgba[..., :3]
+
     # Collect left edge pixels
-    left_edge_pixels = []
-    for x in range(sample_width):
-        for y in range(
-            scan_y_start, scan_y_end, max(1, (scan_y_end - scan_y_start) // 20)
-        ):
-            left_edge_pixels.append(pixels[x, y])
-
-    if left_edge_pixels:
-        r_vals = [p[0] for p in left_edge_pixels]
-        g_vals = [p[1] for p in left_edge_pixels]
-        b_vals = [p[2] for p in left_edge_pixels]
-
-        avg_color = (
-            int(statistics.mean(r_vals)),
-            int(statistics.mean(g_vals)),
-            int(statistics.mean(b_vals)),
-        )
+    edge_step = max(1, (scan_y_end - scan_y_start) // 20)
+    left_edge_pixels = strip[::edge_step, :sample_width].reshape(-1, 3)
+
+    if left_edge_pixels.size:
+        avg, variance = channel_stats(left_edge_pixels)
+        avg_color = tuple(int(c) for c in avg)
+        min_color = left_edge_pixels.min(axis=0)
+        max_color = left_edge_pixels.max(axis=0)
 
         print(f"Average left border color: RGB{avg_color}")
-        print(f"  R: {avg_color[0]} (min: {min(r_vals)}, max: {max(r_vals)})")
-        print(f"  G: {avg_color[1]} (min: {min(g_vals)}, max: {max(g_vals)})")
-        print(f"  B: {avg_color[2]} (min: {min(b_vals)}, max: {max(b_vals)})\n")
+        print(f"  R: {avg_color[0]} (min: {min_color[0]}, max: {max_color[0]})")
+        print(f"  G: {avg_color[1]} (min: {min_color[1]}, max: {max_color[1]})")
+        print(f"  B: {avg_color[2]} (min: {min_color[2]}, max: {max_color[2]})\n")
 
-        # Check variance in the border
-        r_variance = statistics.variance(r_vals) if len(r_vals) > 1 else 0
-        g_variance = statistics.variance(g_vals) if len(g_vals) > 1 else 0
-        b_variance = statistics.variance(b_vals) if len(b_vals) > 1 else 0
+        # Check variance in the border (sample variance, like statistics.variance)
+        r_variance, g_variance, b_variance = variance
 
         print(f"Color variance in border:")
         print(f"  R variance: {r_variance:.2f}")
@@ -76,84 +102,55 @@ def analyze_left_border(image_path: Path):
         print("Checking columns to find where content starts:")
         print("(Looking for columns with different colors or higher variance)\n")
 
-        def color_distance(rgb1, rgb2):
-            return sum((a - b) ** 2 for a, b in zip(rgb1, rgb2)) ** 0.5
-
         # Check columns at different x positions
-        check_positions = [0, 10, 20, 50, 100, 150, 200, 300, 400, 500]
-        for x_pos in check_positions:
-            if x_pos >= width:
-                break
-
-            column_pixels = []
-            for y in range(
-                scan_y_start, scan_y_end, max(1, (scan_y_end - scan_y_start) // 30)
-            ):
-                column_pixels.append(pixels[x_pos, y])
-
-            if column_pixels:
-                col_r = [p[0] for p in column_pixels]
-                col_g = [p[1] for p in column_pixels]
-                col_b = [p[2] for p in column_pixels]
-
-                col_avg = (
-                    int(statistics.mean(col_r)),
-                    int(statistics.mean(col_g)),
-                    int(statistics.mean(col_b)),
-                )
+        check_positions = [x for x in CHECK_COLUMNS if x < width]
+        column_step = max(1, (scan_y_end - scan_y_start) // 30)
+        # (samples, columns, 3) block holding every sampled pixel of every column
+        cols = strip[::column_step, check_positions, :]
+
+        if len(cols):
+            col_means, col_channel_variances = channel_stats(cols)
+            col_avgs = col_means.astype(int)
+            col_variances = col_channel_variances.sum(axis=-1)
+
+            # Check if each column would be considered "border" with tolerance 60
+            margin_ratios = compute_column_margin_ratios(
+                strip_rgba[::column_step, check_positions], avg_color, tolerance=60
+            )
 
-                col_variance = (
-                    statistics.variance(col_r)
-                    + statistics.variance(col_g)
-                    + statistics.variance(col_b)
-                )
-                distance = color_distance(col_avg, avg_color)
-
-                # Check if this column would be considered "border" with tolerance 60
-                margin_count = 0
-                total_samples = 0
-                for pixel in column_pixels:
-                    dist = color_distance(pixel, avg_color)
-                    total_samples += 1
-                    if dist <= 60:
-                        margin_count += 1
-
-                margin_ratio = margin_count / total_samples if total_samples > 0 else 0
+            avg_diff = col_avgs - np.asarray(avg_color)
+            avg_distances = np.sqrt(np.einsum("ij,ij->i", avg_diff, avg_diff))
+
+            for i, x_pos in enumerate(check_positions):
+                col_avg = tuple(int(c) for c in col_avgs[i])
+                distance = avg_distances[i]
+                margin_ratio = margin_ratios[i]
                 is_border = margin_ratio >= 0.9  # Same threshold as the algorithm
 
                 status = "BORDER" if is_border else "CONTENT"
                 print(
                     f"  Column {x_pos:4d}: RGB{col_avg} | Distance: {distance:6.2f} | "
-                    f"Variance: {col_variance:7.2f} | Margin ratio: {margin_ratio:.2f} | {status}"
+                    f"Variance: {col_variances[i]:7.2f} | Margin ratio: {margin_ratio:.2f} | {status}"
                 )
 
         # Sample content area (around column 200-300)
         content_start_x = 200
         content_end_x = min(300, width)
-        content_pixels = []
-        for x in range(content_start_x, content_end_x):
-            for y in range(
-                scan_y_start, scan_y_end, max(1, (scan_y_end - scan_y_start) // 20)
-            ):
-                content_pixels.append(pixels[x, y])
-
-        if content_pixels:
-            content_r = [p[0] for p in content_pixels]
-            content_g = [p[1] for p in content_pixels]
-            content_b = [p[2] for p in content_pixels]
-
-            avg_content_color = (
-                int(statistics.mean(content_r)),
-                int(statistics.mean(content_g)),
-                int(statistics.mean(content_b)),
-            )
+        content_pixels = strip[::edge_step, content_start_x:content_end_x].reshape(
+            -1, 3
+        )
+
+        if content_pixels.size:
+            content_mean, _ = channel_stats(content_pixels)
+            avg_content_color = tuple(int(c) for c in content_mean)
 
             print(
                 f"\nAverage content color (x={content_start_x}-{content_end_x}): RGB{avg_content_color}\n"
             )
 
             # Calculate color distance
-            distance = color_distance(avg_color, avg_content_color)
+            content_diff = np.subtract(avg_color, avg_content_color)
+            distance = np.sqrt(content_diff @ content_diff)
             print(f"Color distance between border and content: {distance:.2f}\n")
 
     # Now test the actual function
@@ -3,7 +3,10 @@
 Extract images from specific pages of a PDF file.
 """
 
+import mmap
+import os
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from pypdf import PdfReader
 from PIL import Image
@@ -12,9 +15,164 @@ import io
 # Import border removal functions
 sys.path.insert(0, str(Path(__file__).parent))
 from notecard_extractor.image_processing import (
-    autocrop_white_border,
-    autocrop_grey_border,
+    find_white_border_box,
+    find_grey_border_lines,
 )
+from notecard_extractor.utils.image_utils import convert_image_to_rgb
+from notecard_extractor.utils.pdf_utils import read_embedded_jpeg
+
+
+def edges_look_white(image: Image.Image, box: tuple, threshold: int = 240) -> bool:
+    """
+    Cheaply check whether a region of an RGB image has no grey side margins to remove.
+
+    Samples a few pixels just inside the left and right edges of the region
+    (past the padding left by the white-border crop) instead of scanning columns.
+
+    Returns:
+        True if every sampled edge pixel is near-white
+    """
+    left, top, right, bottom = box
+    width, height = right - left, bottom - top
+    inset = 3
+    if width <= 2 * inset or height < 4:
+        return False
+    rows = [height // 4, height // 2, (3 * height) // 4]
+    edges = [
+        image.getpixel((x, top + row))
+        for row in rows
+        for x in (left + inset, right - 1 - inset)
+    ]
+    return min(min(pixel) for pixel in edges) > threshold
+
+
+def process_page_image(
+    page_num: int,
+    image_index: int,
+    image_name: str | None,
+    image_data: bytes,
+    raw_dir: Path,
+    white_removed_dir: Path,
+    grey_removed_dir: Path,
+    io_pool: ThreadPoolExecutor,
+) -> tuple[list[str], bool]:
+    """
+    Decode one embedded PDF image and run it through the three stages.
+
+    Progress is returned rather than printed so images can be processed
+    concurrently while the report keeps page and image order. Each stage's
+    image is encoded and written on io_pool while the next stage runs.
+
+    Returns:
+        Tuple of (report lines, whether the image was processed successfully)
+    """
+    lines = []
+    saves = []
+
+    def save_async(stage_image: Image.Image, path: Path) -> None:
+        # Image objects are not safe to load or save from two threads at once
+        # (lazy decoding, encoder state on the object, stages that return their
+        # input unchanged), so the IO pool gets a private copy to encode
+        saves.append(io_pool.submit(stage_image.copy().save, path))
+
+    try:
+        # Determine file extension
+        if image_name:
+            ext = Path(image_name).suffix.lower()
+            if ext not in [".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff"]:
+                ext = ".png"
+        else:
+            ext = ".png"
+
+        # Open image with PIL
+        image = Image.open(io.BytesIO(image_data))
+
+        # Convert to RGB if needed
+        image = convert_image_to_rgb(image)
+
+        # Save raw image (Stage 1)
+        raw_output_path = raw_dir / f"page{page_num + 1}_image{image_index + 1}{ext}"
+        save_async(image, raw_output_path)
+        lines.append(f"  ✓ Stage 1 - Raw image saved: {raw_output_path.name}")
+        lines.append(f"    Size: {image.size[0]}x{image.size[1]} pixels")
+
+        # Stage 2: Remove white borders
+        original_size = image.size
+        white_box = find_white_border_box(image, threshold=250)
+        if white_box is None:
+            white_box = (0, 0, *original_size)
+        # Only copy the pixels when there is a border to remove
+        if white_box == (0, 0, *original_size):
+            processed_image = image
+        else:
+            processed_image = image.crop(white_box)
+        white_left, white_top, white_right, white_bottom = white_box
+
+        final_size = processed_image.size
+        width_reduction = original_size[0] - final_size[0]
+        height_reduction = original_size[1] - final_size[1]
+        lines.append(
+            f"  ✓ Stage 2 - White removed image size: {final_size[0]}x{final_size[1]} pixels"
+        )
+        if width_reduction > 0 or height_reduction > 0:
+            lines.append(
+                f"    Removed {width_reduction}px width, {height_reduction}px height"
+            )
+        else:
+            lines.append(f"    No white borders detected")
+
+        # Save processed image (Stage 2)
+        processed_output_path = (
+            white_removed_dir / f"page{page_num + 1}_image{image_index + 1}{ext}"
+        )
+        save_async(processed_image, processed_output_path)
+        lines.append(f"    Saved to: {processed_output_path.name}")
+
+        # Stage 3: Remove grey borders (left and right), unless the edges left
+        # by the white crop are already white
+        if edges_look_white(image, white_box):
+            grey_removed_image = processed_image
+            lines.append(f"  ✓ Stage 3 - Skipped (no grey detected at edges)")
+        else:
+            # Remove left and right grey borders in one pass, sampling rows of
+            # the white crop's region of the decoded image instead of copying
+            # the whole image into an array
+            left, right = find_grey_border_lines(image, white_box, tolerance=60)
+            if (left, right) == (0, final_size[0]):
+                grey_removed_image = processed_image
+            else:
+                grey_removed_image = image.crop(
+                    (white_left + left, white_top, white_left + right, white_bottom)
+                )
+
+            grey_removed_size_after = grey_removed_image.size
+            width_reduction = final_size[0] - grey_removed_size_after[0]
+            height_reduction = final_size[1] - grey_removed_size_after[1]
+            lines.append(
+                f"  ✓ Stage 3 - Grey removed image size: {grey_removed_size_after[0]}x{grey_removed_size_after[1]} pixels"
+            )
+            if width_reduction > 0 or height_reduction > 0:
+                lines.append(
+                    f"    Removed {width_reduction}px width, {height_reduction}px height"
+                )
+            else:
+                lines.append(f"    No grey borders detected")
+
+        # Save grey removed image (Stage 3)
+        grey_removed_output_path = (
+            grey_removed_dir / f"page{page_num + 1}_image{image_index + 1}{ext}"
+        )
+        save_async(grey_removed_image, grey_removed_output_path)
+        lines.append(f"    Saved to: {grey_removed_output_path.name}")
+
+        # Surface any write errors before reporting success
+        for save in saves:
+            save.result()
+        return lines, True
+
+    except Exception as e:
+        lines.append(f"  ✗ Error extracting image {image_index + 1}: {e}")
+        return lines, False
 
 
 def extract_page_images(
@@ -34,138 +192,91 @@ def extract_page_images(
     print(f"White removed images directory: {white_removed_dir}")
     print(f"Grey removed images directory: {grey_removed_dir}\n")
 
-    reader = PdfReader(pdf_path)
-    total_pages = len(reader.pages)
-    print(f"PDF has {total_pages} page(s)\n")
+    # Memory-map the PDF so pypdf's seeks and reads are served from the page
+    # cache instead of individual read() calls on the file
+    with (
+        open(pdf_path, "rb") as pdf_file,
+        mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map,
+    ):
+        reader = PdfReader(pdf_map)
+        total_pages = len(reader.pages)
+        print(f"PDF has {total_pages} page(s)\n")
 
-    for page_num in page_nums:
-        if page_num >= total_pages:
-            print(
-                f"⚠️  Page {page_num + 1} (index {page_num}) does not exist (PDF has {total_pages} pages)"
-            )
-            continue
-
-        print(f"{'=' * 60}")
-        print(f"Page {page_num + 1} (index {page_num})")
-        print(f"{'=' * 60}")
-
-        page = reader.pages[page_num]
-        images_found = 0
-
-        for image_index, image_file_object in enumerate(page.images):
-            try:
-                # Get image data
-                image_data = image_file_object.data
-
-                # Determine file extension
-                image_name = image_file_object.name
-                if image_name:
-                    ext = Path(image_name).suffix.lower()
-                    if ext not in [".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff"]:
-                        ext = ".png"
-                else:
-                    ext = ".png"
-
-                # Open image with PIL
-                image = Image.open(io.BytesIO(image_data))
-
-                # Convert to RGB if needed
-                if image.mode in ("RGBA", "LA", "P"):
-                    rgb_img = Image.new("RGB", image.size, (255, 255, 255))
-                    if image.mode == "P":
-                        image = image.convert("RGBA")
-                    rgb_img.paste(
-                        image,
-                        mask=image.split()[-1] if image.mode == "RGBA" else None,
-                    )
-                    image = rgb_img
-                elif image.mode != "RGB":
-                    image = image.convert("RGB")
+        # Pillow releases the GIL while decoding, cropping and encoding, so the
+        # per-image stages run on a thread pool, with a second small pool for
+        # saving files. pypdf is not thread-safe, so the embedded image
+        # streams are read here on the main thread.
+        with (
+            ThreadPoolExecutor(max_workers=4) as io_pool,
+            ThreadPoolExecutor(max_workers=os.cpu_count()) as executor,
+        ):
+            page_jobs = []
+            for page_num in page_nums:
+                if page_num >= total_pages:
+                    page_jobs.append((page_num, None))
+                    continue
 
-                # Save raw image (Stage 1)
-                raw_output_path = (
-                    raw_dir / f"page{page_num + 1}_image{image_index + 1}{ext}"
-                )
-                image.save(raw_output_path)
-                print(f"  ✓ Stage 1 - Raw image saved: {raw_output_path.name}")
-                print(f"    Size: {image.size[0]}x{image.size[1]} pixels")
-
-                # Stage 2: Remove white borders using autocrop_white_border
-                original_size = image.size
-                processed_image = autocrop_white_border(image, threshold=250)
-
-                final_size = processed_image.size
-                width_reduction = original_size[0] - final_size[0]
-                height_reduction = original_size[1] - final_size[1]
-                print(
-                    f"  ✓ Stage 2 - White removed image size: {final_size[0]}x{final_size[1]} pixels"
-                )
-                if width_reduction > 0 or height_reduction > 0:
-                    print(
-                        f"    Removed {width_reduction}px width, {height_reduction}px height"
+                # Resolve the page's image ids once, then read every stream.
+                # Plain JPEG streams are taken as they are embedded; pypdf
+                # would decode and re-encode them first
+                page = reader.pages[page_num]
+                images = page.images
+                jobs = []
+                for image_index, image_id in enumerate(images.keys()):
+                    try:
+                        embedded = read_embedded_jpeg(page, image_id)
+                        if embedded is not None:
+                            image_data = embedded[1]
+                            image_name = f"{image_id[1:]}.jpg"
+                        else:
+                            image_file_object = images[image_id]
+                            image_name = image_file_object.name
+                            image_data = image_file_object.data
+                    except Exception as e:
+                        jobs.append(
+                            (
+                                [f"  ✗ Error extracting image {image_index + 1}: {e}"],
+                                False,
+                            )
+                        )
+                        continue
+                    jobs.append(
+                        executor.submit(
+                            process_page_image,
+                            page_num,
+                            image_index,
+                            image_name,
+                            image_data,
+                            raw_dir,
+                            white_removed_dir,
+                            grey_removed_dir,
+                            io_pool,
+                        )
                     )
-                else:
-                    print(f"    No white borders detected")
-
-                # Save processed image (Stage 2)
-                processed_output_path = (
-                    white_removed_dir
-                    / f"page{page_num + 1}_image{image_index + 1}{ext}"
-                )
-                processed_image.save(processed_output_path)
-                print(f"    Saved to: {processed_output_path.name}")
-
-                # Stage 3: Remove grey borders (left and right)
-                grey_removed_image = processed_image.copy()
-                grey_removed_size_before = grey_removed_image.size
-
-                # Remove left grey border
-                grey_removed_image = autocrop_grey_border(
-                    grey_removed_image,
-                    border_color=None,
-                    tolerance=60,
-                    sides="left",
-                )
-                # Remove right grey border
-                grey_removed_image = autocrop_grey_border(
-                    grey_removed_image,
-                    border_color=None,
-                    tolerance=60,
-                    sides="right",
-                )
+                page_jobs.append((page_num, jobs))
 
-                grey_removed_size_after = grey_removed_image.size
-                width_reduction = (
-                    grey_removed_size_before[0] - grey_removed_size_after[0]
-                )
-                height_reduction = (
-                    grey_removed_size_before[1] - grey_removed_size_after[1]
-                )
-                print(
-                    f"  ✓ Stage 3 - Grey removed image size: {grey_removed_size_after[0]}x{grey_removed_size_after[1]} pixels"
-                )
-                if width_reduction > 0 or height_reduction > 0:
+            # Report in page and image order as results complete
+            for page_num, jobs in page_jobs:
+                if jobs is None:
                     print(
-                        f"    Removed {width_reduction}px width, {height_reduction}px height"
+                        f"⚠️  Page {page_num + 1} (index {page_num}) does not exist (PDF has {total_pages} pages)"
                     )
-                else:
-                    print(f"    No grey borders detected")
+                    continue
 
-                # Save grey removed image (Stage 3)
-                grey_removed_output_path = (
-                    grey_removed_dir / f"page{page_num + 1}_image{image_index + 1}{ext}"
-                )
-                grey_removed_image.save(grey_removed_output_path)
-                print(f"    Saved to: {grey_removed_output_path.name}")
-                images_found += 1
+                print(f"{'=' * 60}")
+                print(f"Page {page_num + 1} (index {page_num})")
+                print(f"{'=' * 60}")
 
-            except Exception as e:
-                print(f"  ✗ Error extracting image {image_index + 1}: {e}")
-                continue
+                images_found = 0
+                for job in jobs:
+                    lines, ok = job.result() if isinstance(job, Future) else job
+                    for line in lines:
+                        print(line)
+                    images_found += ok
 
-        if images_found == 0:
-            print(f"  ⚠️  No images found on page {page_num + 1}")
-        print()
+                if images_found == 0:
+                    print(f"  ⚠️  No images found on page {page_num + 1}")
+                print()
 
     print(f"{'=' * 60}")
     print(f"Extraction complete!")
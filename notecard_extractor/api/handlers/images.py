@@ -4,299 +4,226 @@ Image API handlers.
 Handles image retrieval endpoints.
 """
 
-from flask import request, Response
-from notecard_extractor.utils.db_utils import get_db_session, get_db_engine
-from notecard_extractor.utils.cache_utils import get_cache_headers, check_cache_etag
-from notecard_extractor.database import Recipe, RecipeImage, DishImage
+import io
+from flask import request, Response, send_file
+from notecard_extractor.utils.db_utils import get_db_session
+from notecard_extractor.utils.cache_utils import (
+    get_cache_headers,
+    check_cache_etag,
+    image_blob_cache,
+)
+from notecard_extractor.database import RecipeImage, DishImage
 from notecard_extractor.api.responses import (
+    error_response,
     not_found_response,
-    database_not_initialized_response,
 )
 
 
-def handle_get_recipe_image(recipe_id: int):
-    """Handle get recipe image (page 1) endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
+def _accepts_webp() -> bool:
+    """Check whether the client explicitly lists image/webp in its Accept header."""
+    return any(
+        mimetype == "image/webp" and quality > 0
+        for mimetype, quality in request.accept_mimetypes
+    )
+
+
+def _serve_blob(
+    session, blob_column, hash_column, criteria, resource, filename, webp_column=None
+):
+    """
+    Serve a stored image blob with ETag caching.
+    The image hash is looked up first: it answers ETag revalidations and
+    keys the in-process blob cache, so the blob itself is only selected on
+    a cache miss. When a WebP column is given and the client accepts WebP,
+    the precomputed WebP version is served if the row has one.
+
+    Args:
+        session: Database session
+        blob_column: Model column holding the PNG image bytes
+        hash_column: Model column holding the PNG image SHA256
+        criteria: Column values identifying the image row
+        resource: Resource name used in the 404 message
+        filename: Filename for the Content-Disposition header
+        webp_column: Optional model column holding the WebP version
+
+    Returns:
+        Image response, 304 Not Modified, or 404 response
+    """
+    mimetype = "image/png"
+    if webp_column is not None and _accepts_webp():
+        row = (
+            session.query(hash_column, webp_column.isnot(None))
+            .filter_by(**criteria)
+            .one_or_none()
+        )
+        image_hash, has_webp = row if row else (None, False)
+        if has_webp:
+            # The WebP version is derived from the PNG, so its ETag is too
+            blob_column = webp_column
+            mimetype = "image/webp"
+            image_hash = f"{image_hash}-webp" if image_hash else None
+            filename = f"{filename.rsplit('.', 1)[0]}.webp"
+    else:
+        image_hash = session.query(hash_column).filter_by(**criteria).scalar()
+
+    headers = get_cache_headers(image_hash)
+    if webp_column is not None:
+        headers["Vary"] = "Accept"
+
+    if check_cache_etag(request.headers.get("If-None-Match"), image_hash):
+        return Response(status=304, headers=headers)  # Not Modified
+
+    image_data = image_blob_cache.get(image_hash) if image_hash else None
+    if image_data is None:
+        image_data = session.query(blob_column).filter_by(**criteria).scalar()
+        if image_data and image_hash:
+            image_blob_cache.put(image_hash, image_data)
+    if not image_data:
+        return not_found_response(resource)
+
+    response = send_file(
+        io.BytesIO(image_data),
+        mimetype=mimetype,
+        download_name=filename,
+        etag=False,
+    )
+    response.headers.update(headers)
+    return response
+
+
+def _serve_recipe_image_blob(
+    recipe_id: int,
+    page_number: int,
+    blob_column,
+    hash_column,
+    webp_column,
+    resource,
+    filename,
+):
+    """Serve one of the stored versions of a recipe page image."""
     try:
         with get_db_session() as session:
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
-                return not_found_response("Recipe")
-
-            recipe_image = (
-                session.query(RecipeImage)
-                .filter(RecipeImage.recipe_id == recipe_id)
-                .filter(RecipeImage.pdf_page_number == 0)
-                .first()
-            )
-
-            if not recipe_image or not recipe_image.cropped_image_data:
-                return not_found_response("Processed image for page 1")
-
-            # Check cache with ETag
-            request_etag = request.headers.get("If-None-Match")
-            image_hash = recipe_image.cropped_image_sha256
-            if check_cache_etag(request_etag, image_hash):
-                return Response(status=304)  # Not Modified
-
-            headers = get_cache_headers(image_hash)
-            headers["Content-Disposition"] = f"inline; filename=recipe_{recipe_id}.png"
-
-            return Response(
-                recipe_image.cropped_image_data,
-                mimetype="image/png",
-                headers=headers,
+            # A missing recipe has no images, so the image lookup alone
+            # decides the 404
+            return _serve_blob(
+                session,
+                blob_column,
+                hash_column,
+                {"recipe_id": recipe_id, "pdf_page_number": page_number},
+                resource,
+                filename,
+                webp_column=webp_column,
             )
 
     except Exception as e:
-        from notecard_extractor.api.responses import error_response
         return error_response(str(e))
 
 
-def handle_get_recipe_thumbnail(recipe_id: int):
-    """Handle get recipe thumbnail (page 1) endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
+def _serve_dish_image_blob(
+    recipe_id: int, image_number: int, blob_column, hash_column, resource, filename
+):
+    """Serve one of the stored versions of a dish image."""
     try:
         with get_db_session() as session:
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
-                return not_found_response("Recipe")
-
-            recipe_image = (
-                session.query(RecipeImage)
-                .filter(RecipeImage.recipe_id == recipe_id)
-                .filter(RecipeImage.pdf_page_number == 0)
-                .first()
-            )
-
-            if not recipe_image or not recipe_image.thumbnail_data:
-                return not_found_response("Thumbnail for page 1")
-
-            request_etag = request.headers.get("If-None-Match")
-            image_hash = recipe_image.thumbnail_sha256
-            if check_cache_etag(request_etag, image_hash):
-                return Response(status=304)
-
-            headers = get_cache_headers(image_hash)
-            headers["Content-Disposition"] = f"inline; filename=recipe_{recipe_id}_thumb.png"
-
-            return Response(
-                recipe_image.thumbnail_data,
-                mimetype="image/png",
-                headers=headers,
+            # A missing recipe has no images, so the image lookup alone
+            # decides the 404
+            return _serve_blob(
+                session,
+                blob_column,
+                hash_column,
+                {"recipe_id": recipe_id, "image_number": image_number},
+                resource,
+                filename,
             )
 
     except Exception as e:
-        from notecard_extractor.api.responses import error_response
         return error_response(str(e))
 
 
-def handle_get_recipe_medium(recipe_id: int):
-    """Handle get recipe medium image (page 1) endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
-    try:
-        with get_db_session() as session:
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
-                return not_found_response("Recipe")
-
-            recipe_image = (
-                session.query(RecipeImage)
-                .filter(RecipeImage.recipe_id == recipe_id)
-                .filter(RecipeImage.pdf_page_number == 0)
-                .first()
-            )
-
-            if not recipe_image or not recipe_image.medium_image_data:
-                return not_found_response("Medium image for page 1")
+def handle_get_recipe_image(recipe_id: int):
+    """Handle get recipe image (page 1) endpoint."""
+    return _serve_recipe_image_blob(
+        recipe_id,
+        0,
+        RecipeImage.cropped_image_data,
+        RecipeImage.cropped_image_sha256,
+        RecipeImage.cropped_image_webp,
+        "Processed image for page 1",
+        f"recipe_{recipe_id}.png",
+    )
 
-            request_etag = request.headers.get("If-None-Match")
-            image_hash = recipe_image.medium_image_sha256
-            if check_cache_etag(request_etag, image_hash):
-                return Response(status=304)
 
-            headers = get_cache_headers(image_hash)
-            headers["Content-Disposition"] = f"inline; filename=recipe_{recipe_id}_medium.png"
+def handle_get_recipe_thumbnail(recipe_id: int):
+    """Handle get recipe thumbnail (page 1) endpoint."""
+    return _serve_recipe_image_blob(
+        recipe_id,
+        0,
+        RecipeImage.thumbnail_data,
+        RecipeImage.thumbnail_sha256,
+        RecipeImage.thumbnail_webp,
+        "Thumbnail for page 1",
+        f"recipe_{recipe_id}_thumb.png",
+    )
 
-            return Response(
-                recipe_image.medium_image_data,
-                mimetype="image/png",
-                headers=headers,
-            )
 
-    except Exception as e:
-        from notecard_extractor.api.responses import error_response
-        return error_response(str(e))
+def handle_get_recipe_medium(recipe_id: int):
+    """Handle get recipe medium image (page 1) endpoint."""
+    return _serve_recipe_image_blob(
+        recipe_id,
+        0,
+        RecipeImage.medium_image_data,
+        RecipeImage.medium_image_sha256,
+        RecipeImage.medium_image_webp,
+        "Medium image for page 1",
+        f"recipe_{recipe_id}_medium.png",
+    )
 
 
 def handle_get_recipe_page_thumbnail(recipe_id: int, page_number: int):
     """Handle get recipe page thumbnail endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
-    try:
-        with get_db_session() as session:
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
-                return not_found_response("Recipe")
-
-            recipe_image = (
-                session.query(RecipeImage)
-                .filter(RecipeImage.recipe_id == recipe_id)
-                .filter(RecipeImage.pdf_page_number == page_number)
-                .first()
-            )
-
-            if not recipe_image or not recipe_image.thumbnail_data:
-                return not_found_response(f"Thumbnail for page {page_number + 1}")
-
-            request_etag = request.headers.get("If-None-Match")
-            image_hash = recipe_image.thumbnail_sha256
-            if check_cache_etag(request_etag, image_hash):
-                return Response(status=304)
-
-            headers = get_cache_headers(image_hash)
-            headers["Content-Disposition"] = f"inline; filename=recipe_{recipe_id}_page{page_number}_thumb.png"
-
-            return Response(
-                recipe_image.thumbnail_data,
-                mimetype="image/png",
-                headers=headers,
-            )
-
-    except Exception as e:
-        from notecard_extractor.api.responses import error_response
-        return error_response(str(e))
+    return _serve_recipe_image_blob(
+        recipe_id,
+        page_number,
+        RecipeImage.thumbnail_data,
+        RecipeImage.thumbnail_sha256,
+        RecipeImage.thumbnail_webp,
+        f"Thumbnail for page {page_number + 1}",
+        f"recipe_{recipe_id}_page{page_number}_thumb.png",
+    )
 
 
 def handle_get_recipe_page_image(recipe_id: int, page_number: int):
     """Handle get recipe page image endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
-    try:
-        with get_db_session() as session:
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
-                return not_found_response("Recipe")
-
-            recipe_image = (
-                session.query(RecipeImage)
-                .filter(RecipeImage.recipe_id == recipe_id)
-                .filter(RecipeImage.pdf_page_number == page_number)
-                .first()
-            )
-
-            if not recipe_image or not recipe_image.cropped_image_data:
-                return not_found_response(f"Image for page {page_number + 1}")
-
-            request_etag = request.headers.get("If-None-Match")
-            image_hash = recipe_image.cropped_image_sha256
-            if check_cache_etag(request_etag, image_hash):
-                return Response(status=304)
-
-            headers = get_cache_headers(image_hash)
-            headers["Content-Disposition"] = f"inline; filename=recipe_{recipe_id}_page{page_number}.png"
-
-            return Response(
-                recipe_image.cropped_image_data,
-                mimetype="image/png",
-                headers=headers,
-            )
-
-    except Exception as e:
-        from notecard_extractor.api.responses import error_response
-        return error_response(str(e))
+    return _serve_recipe_image_blob(
+        recipe_id,
+        page_number,
+        RecipeImage.cropped_image_data,
+        RecipeImage.cropped_image_sha256,
+        RecipeImage.cropped_image_webp,
+        f"Image for page {page_number + 1}",
+        f"recipe_{recipe_id}_page{page_number}.png",
+    )
 
 
 def handle_get_dish_image_thumbnail(recipe_id: int, image_number: int):
     """Handle get dish image thumbnail endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
-    try:
-        with get_db_session() as session:
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
-                return not_found_response("Recipe")
-
-            dish_image = (
-                session.query(DishImage)
-                .filter(DishImage.recipe_id == recipe_id)
-                .filter(DishImage.image_number == image_number)
-                .first()
-            )
-
-            if not dish_image or not dish_image.thumbnail_data:
-                return not_found_response(f"Thumbnail for dish image {image_number}")
-
-            request_etag = request.headers.get("If-None-Match")
-            image_hash = dish_image.thumbnail_sha256
-            if check_cache_etag(request_etag, image_hash):
-                return Response(status=304)
-
-            headers = get_cache_headers(image_hash)
-            headers["Content-Disposition"] = f"inline; filename=recipe_{recipe_id}_dish{image_number}_thumb.png"
-
-            return Response(
-                dish_image.thumbnail_data,
-                mimetype="image/png",
-                headers=headers,
-            )
-
-    except Exception as e:
-        from notecard_extractor.api.responses import error_response
-        return error_response(str(e))
+    return _serve_dish_image_blob(
+        recipe_id,
+        image_number,
+        DishImage.thumbnail_data,
+        DishImage.thumbnail_sha256,
+        f"Thumbnail for dish image {image_number}",
+        f"recipe_{recipe_id}_dish{image_number}_thumb.png",
+    )
 
 
 def handle_get_dish_image(recipe_id: int, image_number: int):
     """Handle get dish image endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
-    try:
-        with get_db_session() as session:
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
-                return not_found_response("Recipe")
-
-            dish_image = (
-                session.query(DishImage)
-                .filter(DishImage.recipe_id == recipe_id)
-                .filter(DishImage.image_number == image_number)
-                .first()
-            )
-
-            if not dish_image or not dish_image.image_data:
-                return not_found_response(f"Image for dish image {image_number}")
-
-            request_etag = request.headers.get("If-None-Match")
-            image_hash = dish_image.image_sha256
-            if check_cache_etag(request_etag, image_hash):
-                return Response(status=304)
-
-            headers = get_cache_headers(image_hash)
-            headers["Content-Disposition"] = f"inline; filename=recipe_{recipe_id}_dish{image_number}.png"
-
-            return Response(
-                dish_image.image_data,
-                mimetype="image/png",
-                headers=headers,
-            )
-
-    except Exception as e:
-        from notecard_extractor.api.responses import error_response
-        return error_response(str(e))
+    return _serve_dish_image_blob(
+        recipe_id,
+        image_number,
+        DishImage.image_data,
+        DishImage.image_sha256,
+        f"Image for dish image {image_number}",
+        f"recipe_{recipe_id}_dish{image_number}.png",
+    )
@@ -4,34 +4,36 @@ Recipe API handlers.
 Handles recipe-related API endpoints.
 """
 
-import hashlib
 from datetime import datetime
+from sqlalchemy import insert
 from flask import request
-from notecard_extractor.utils.db_utils import get_db_session, get_db_engine
-from notecard_extractor.utils.cache_utils import get_cache_headers, check_cache_etag
+from notecard_extractor.utils.db_utils import get_db_session
+from notecard_extractor.utils.cache_utils import get_revalidate_headers, check_cache_etag
 from notecard_extractor.services.pdf_service import process_pdf_images
+from notecard_extractor.utils.pdf_utils import read_and_hash_pdf
 from notecard_extractor.services.recipe_service import (
     get_recipe_list,
+    get_recipe_list_version,
     get_recipe_details,
+    get_recipe_version,
+    touch_recipe,
+    add_recipe_images,
+    update_recipe_image,
+    update_dish_image,
     update_recipe_fields,
 )
-from notecard_extractor.database import Recipe, RecipeImage, RecipeState
+from notecard_extractor.database import Recipe
 from notecard_extractor.api.responses import (
     success_response,
     error_response,
     not_found_response,
     bad_request_response,
-    database_not_initialized_response,
 )
 from flask import Response, jsonify
 
 
 def handle_upload_pdfs():
     """Handle PDF upload endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         if "files" not in request.files:
             return bad_request_response("No files provided")
@@ -58,27 +60,27 @@ def handle_upload_pdfs():
                     continue
 
                 try:
-                    # Read PDF data
-                    pdf_data = file.read()
-                    file.seek(0)  # Reset file pointer
-
-                    # Calculate SHA256 hash
-                    pdf_hash = hashlib.sha256(pdf_data).hexdigest()
-
-                    # Check if PDF with this hash already exists
-                    existing = (
-                        session.query(Recipe)
+                    # Read PDF data, calculating the SHA256 hash as it streams in
+                    pdf_data, pdf_hash = read_and_hash_pdf(file.stream)
+
+                    # Check if PDF with this hash already exists (an index seek on
+                    # the hash column) before any image processing. Databases
+                    # created before the hash was unique may hold duplicates,
+                    # so only the first match is fetched
+                    existing_id = (
+                        session.query(Recipe.id)
                         .filter(Recipe.original_pdf_sha256 == pdf_hash)
-                        .first()
+                        .limit(1)
+                        .scalar()
                     )
 
-                    if existing:
+                    if existing_id is not None:
                         results.append(
                             {
                                 "filename": file.filename,
                                 "status": "duplicate",
-                                "message": f"PDF already exists (ID: {existing.id})",
-                                "recipe_id": existing.id,
+                                "message": f"PDF already exists (ID: {existing_id})",
+                                "recipe_id": existing_id,
                             }
                         )
                         continue
@@ -96,56 +98,39 @@ def handle_upload_pdfs():
                         )
                         continue
 
-                    # Create a single recipe entry (without image data)
-                    recipe = Recipe(
-                        original_pdf_data=pdf_data,
-                        original_pdf_sha256=pdf_hash,
-                        pdf_filename=file.filename,
-                        pdf_upload_timestamp=datetime.utcnow(),
-                    )
-
-                    session.add(recipe)
-                    session.commit()
-                    session.refresh(recipe)
-
-                    # Create RecipeImage entries for each page
-                    for (
-                        page_num,
-                        cropped_image_data,
-                        cropped_image_hash,
-                        medium_image_data,
-                        medium_image_hash,
-                        thumbnail_data,
-                        thumbnail_hash,
-                    ) in image_results:
-                        recipe_image = RecipeImage(
-                            recipe_id=recipe.id,
-                            pdf_page_number=page_num,
-                            rotation=0,
-                            cropped_image_data=cropped_image_data,
-                            cropped_image_sha256=cropped_image_hash,
-                            medium_image_data=medium_image_data,
-                            medium_image_sha256=medium_image_hash,
-                            thumbnail_data=thumbnail_data,
-                            thumbnail_sha256=thumbnail_hash,
-                            unneeded=False,
-                        )
-
-                        session.add(recipe_image)
-
-                    session.commit()
+                    # Each file gets a SAVEPOINT within the batch transaction,
+                    # so a failed insert only reverts that file
+                    with session.begin_nested():
+                        upload_time = datetime.utcnow()
+
+                        # Create a single recipe entry (without image data). A Core
+                        # INSERT keeps the PDF blob out of the identity map and
+                        # returns the new id without reloading the row.
+                        recipe_id = session.execute(
+                            insert(Recipe)
+                            .values(
+                                original_pdf_data=pdf_data,
+                                original_pdf_sha256=pdf_hash,
+                                pdf_filename=file.filename,
+                                pdf_upload_timestamp=upload_time,
+                                updated_at=upload_time,
+                            )
+                            .returning(Recipe.id)
+                        ).scalar_one()
+
+                        # Create RecipeImage entries for all pages in one batch
+                        add_recipe_images(session, recipe_id, image_results)
 
                     results.append(
                         {
                             "filename": file.filename,
                             "status": "success",
                             "message": f"PDF with {len(image_results)} page(s) stored successfully",
-                            "recipe_id": recipe.id,
+                            "recipe_id": recipe_id,
                         }
                     )
 
                 except Exception as e:
-                    session.rollback()
                     results.append(
                         {
                             "filename": file.filename,
@@ -154,6 +139,9 @@ def handle_upload_pdfs():
                         }
                     )
 
+            # Commit every stored file in a single transaction
+            session.commit()
+
         return jsonify({"results": results, "total": len(results)})
 
     except Exception as e:
@@ -162,14 +150,18 @@ def handle_upload_pdfs():
 
 def handle_get_recipes():
     """Handle get recipes list endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         with get_db_session() as session:
+            # Answer revalidation from a cheap version query before building the list
+            version = get_recipe_list_version(session)
+            headers = get_revalidate_headers(version)
+            if check_cache_etag(request.headers.get("If-None-Match"), version):
+                return Response(status=304, headers=headers)  # Not Modified
+
             results = get_recipe_list(session)
-            return jsonify({"recipes": results, "total": len(results)})
+            response = jsonify({"recipes": results, "total": len(results)})
+            response.headers.update(headers)
+            return response
 
     except Exception as e:
         return error_response(str(e))
@@ -177,16 +169,21 @@ def handle_get_recipes():
 
 def handle_get_recipe(recipe_id: int):
     """Handle get single recipe endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         with get_db_session() as session:
+            version = get_recipe_version(session, recipe_id)
+            if version is None:
+                return not_found_response("Recipe")
+            headers = get_revalidate_headers(version)
+            if check_cache_etag(request.headers.get("If-None-Match"), version):
+                return Response(status=304, headers=headers)  # Not Modified
+
             result = get_recipe_details(session, recipe_id)
             if not result:
                 return not_found_response("Recipe")
-            return jsonify(result)
+            response = jsonify(result)
+            response.headers.update(headers)
+            return response
 
     except Exception as e:
         return error_response(str(e))
@@ -194,10 +191,6 @@ def handle_get_recipe(recipe_id: int):
 
 def handle_update_recipe(recipe_id: int):
     """Handle update recipe endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         data = request.get_json()
         if not data:
@@ -205,13 +198,9 @@ def handle_update_recipe(recipe_id: int):
 
         with get_db_session() as session:
             try:
-                if "state" in data:
-                    # Validate state
-                    RecipeState(data["state"])
-            except ValueError:
-                return bad_request_response(f"Invalid state: {data['state']}")
-
-            success = update_recipe_fields(session, recipe_id, data)
+                success = update_recipe_fields(session, recipe_id, data)
+            except ValueError as e:
+                return bad_request_response(str(e))
             if not success:
                 return not_found_response("Recipe")
 
@@ -224,10 +213,6 @@ def handle_update_recipe(recipe_id: int):
 
 def handle_update_recipe_rotation(recipe_id: int):
     """Handle update recipe rotation endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         data = request.get_json()
         if not data or "rotation" not in data:
@@ -242,46 +227,24 @@ def handle_update_recipe_rotation(recipe_id: int):
         dish_number = data.get("dish_number")
 
         with get_db_session() as session:
-            from notecard_extractor.database import DishImage
-            
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
+            # Check the recipe exists and mark it changed without loading it
+            if not touch_recipe(session, recipe_id):
                 return not_found_response("Recipe")
 
             if image_type == "page" and page_number is not None:
-                recipe_image = (
-                    session.query(RecipeImage)
-                    .filter(RecipeImage.recipe_id == recipe_id)
-                    .filter(RecipeImage.pdf_page_number == page_number)
-                    .first()
-                )
-                if not recipe_image:
+                if not update_recipe_image(
+                    session, recipe_id, page_number, rotation=rotation
+                ):
                     return not_found_response(f"Image for page {page_number + 1}")
-                recipe_image.rotation = rotation
-                session.add(recipe_image)
             elif image_type == "dish" and dish_number is not None:
-                dish_image = (
-                    session.query(DishImage)
-                    .filter(DishImage.recipe_id == recipe_id)
-                    .filter(DishImage.image_number == dish_number)
-                    .first()
-                )
-                if not dish_image:
+                if not update_dish_image(
+                    session, recipe_id, dish_number, rotation=rotation
+                ):
                     return not_found_response(f"Dish image {dish_number}")
-                dish_image.rotation = rotation
-                session.add(dish_image)
             else:
                 # Default to page 1 image (backward compatibility)
-                recipe_image = (
-                    session.query(RecipeImage)
-                    .filter(RecipeImage.recipe_id == recipe_id)
-                    .filter(RecipeImage.pdf_page_number == 0)
-                    .first()
-                )
-                if not recipe_image:
+                if not update_recipe_image(session, recipe_id, 0, rotation=rotation):
                     return not_found_response("Image for page 1")
-                recipe_image.rotation = rotation
-                session.add(recipe_image)
 
             session.commit()
             return success_response(data={"rotation": rotation})
@@ -292,10 +255,6 @@ def handle_update_recipe_rotation(recipe_id: int):
 
 def handle_update_recipe_image_unneeded(recipe_id: int, page_number: int):
     """Handle update recipe image unneeded flag endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         data = request.get_json()
         if not data or "unneeded" not in data:
@@ -304,24 +263,17 @@ def handle_update_recipe_image_unneeded(recipe_id: int, page_number: int):
         unneeded = bool(data["unneeded"])
 
         with get_db_session() as session:
-            recipe = session.get(Recipe, recipe_id)
-            if not recipe:
+            # Check the recipe exists and mark it changed without loading it
+            if not touch_recipe(session, recipe_id):
                 return not_found_response("Recipe")
 
-            recipe_image = (
-                session.query(RecipeImage)
-                .filter(RecipeImage.recipe_id == recipe_id)
-                .filter(RecipeImage.pdf_page_number == page_number)
-                .first()
-            )
-            
-            if not recipe_image:
+            if not update_recipe_image(
+                session, recipe_id, page_number, unneeded=unneeded
+            ):
                 return not_found_response(f"Image for page {page_number + 1}")
-            
-            recipe_image.unneeded = unneeded
-            session.add(recipe_image)
+
             session.commit()
-            
+
             return success_response(data={"unneeded": unneeded})
 
     except Exception as e:
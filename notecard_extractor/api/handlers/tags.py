@@ -5,7 +5,7 @@ Handles tag-related API endpoints.
 """
 
 from flask import request, jsonify
-from notecard_extractor.utils.db_utils import get_db_session, get_db_engine
+from notecard_extractor.utils.db_utils import get_db_session
 from notecard_extractor.services.recipe_service import (
     get_recipe_tags,
     add_tag_to_recipe,
@@ -17,16 +17,11 @@ from notecard_extractor.api.responses import (
     error_response,
     not_found_response,
     bad_request_response,
-    database_not_initialized_response,
 )
 
 
 def handle_add_recipe_tag(recipe_id: int):
     """Handle add tag to recipe endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         data = request.get_json()
         if not data or "tag_name" not in data:
@@ -56,10 +51,6 @@ def handle_add_recipe_tag(recipe_id: int):
 
 def handle_remove_recipe_tag(recipe_id: int, recipe_tag_id: int):
     """Handle remove tag from recipe endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         with get_db_session() as session:
             success = remove_tag_from_recipe(session, recipe_id, recipe_tag_id)
@@ -75,10 +66,6 @@ def handle_remove_recipe_tag(recipe_id: int, recipe_tag_id: int):
 
 def handle_get_tags_with_counts():
     """Handle get all tags with counts endpoint."""
-    db_engine = get_db_engine()
-    if db_engine is None:
-        return database_not_initialized_response()
-
     try:
         with get_db_session() as session:
             tags = get_all_tags_with_counts(session)
@@ -4,8 +4,10 @@ Flask route definitions.
 Registers all API routes with their handlers.
 """
 
-from flask import Flask, render_template
+from flask import Flask, render_template, request
 from notecard_extractor.api.handlers import recipes, images, tags
+from notecard_extractor.api.responses import database_not_initialized_response
+from notecard_extractor.utils.db_utils import get_db_engine
 
 
 def register_routes(app: Flask):
@@ -15,6 +17,13 @@ def register_routes(app: Flask):
     Args:
         app: Flask application instance
     """
+    # Every API endpoint needs the database, so check for it once here
+    # instead of at the top of each handler
+    @app.before_request
+    def require_db_engine():
+        if request.path.startswith("/api/") and get_db_engine() is None:
+            return database_not_initialized_response()
+
     # Main page
     @app.route("/")
     def index():
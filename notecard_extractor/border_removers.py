@@ -4,13 +4,122 @@ Border removal commands.
 CLI commands for removing white and grey borders from images.
 """
 
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Callable
 import typer
 from PIL import Image
+from notecard_extractor.config import PNG_COMPRESS_LEVEL
 from notecard_extractor.image_processing import (
     autocrop_white_border,
     autocrop_grey_border,
 )
+from notecard_extractor.utils.image_utils import convert_image_to_rgb
+
+# File extensions (compared case-insensitively) of images to process
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"}
+
+# Modes cropped before conversion: without transparency to flatten, the
+# crop boxes are the same as on the image converted to RGB
+GRAYSCALE_MODES = {"L", "1"}
+
+
+def _find_image_files(input_folder: Path) -> list[Path]:
+    """
+    List the image files in a folder with a single directory scan.
+
+    Args:
+        input_folder: Folder to search
+
+    Returns:
+        Sorted list of image file paths
+    """
+    with os.scandir(input_folder) as entries:
+        return sorted(
+            Path(entry.path)
+            for entry in entries
+            if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            and entry.is_file()
+        )
+
+
+def _crop_image_file(
+    image_file: Path, output_folder: Path, crop: Callable[[Image.Image], Image.Image]
+) -> Path:
+    """
+    Open an image, crop it and save it to the output folder under the same name.
+
+    Args:
+        image_file: Image file to process
+        output_folder: Folder to save the cropped image to
+        crop: Function that crops an RGB or grayscale image
+
+    Returns:
+        Path of the saved image
+    """
+    # Open and process image
+    with Image.open(image_file) as original_img:
+        if original_img.mode in GRAYSCALE_MODES:
+            # The border scans read grayscale pixels as they are, so crop
+            # first and expand only the kept pixels to RGB
+            cropped_img = convert_image_to_rgb(crop(original_img))
+        else:
+            # Flatten transparency onto white once up front, so the crop (and
+            # a JPEG output) always gets an RGB image
+            cropped_img = crop(convert_image_to_rgb(original_img))
+
+        # Save the cropped image
+        output_path = output_folder / image_file.name
+        suffix = output_path.suffix.lower()
+        if (
+            cropped_img is original_img
+            and Image.registered_extensions().get(suffix) == original_img.format
+        ):
+            # Nothing was converted or cropped, so copy the file instead of
+            # re-encoding it (which would also lose quality for JPEG and WebP)
+            shutil.copyfile(image_file, output_path)
+        # Preserve format
+        elif suffix in [".jpg", ".jpeg"]:
+            cropped_img.save(output_path, "JPEG", quality=95)
+        elif suffix == ".png":
+            # Fast zlib level: the PNG is lossless either way
+            cropped_img.save(output_path, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+        else:
+            cropped_img.save(output_path)
+
+    return output_path
+
+
+def _crop_image_files(
+    image_files: list[Path],
+    output_folder: Path,
+    crop: Callable[[Image.Image], Image.Image],
+) -> None:
+    """
+    Crop and save images on a thread pool, reporting progress in file order.
+    Pillow releases the GIL while decoding and encoding, and the border scans
+    run in NumPy, so images are processed in parallel across cores.
+
+    Args:
+        image_files: Image files to process
+        output_folder: Folder to save the cropped images to
+        crop: Function that crops an RGB or grayscale image
+    """
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = [
+            executor.submit(_crop_image_file, image_file, output_folder, crop)
+            for image_file in image_files
+        ]
+        for image_file, future in zip(image_files, futures):
+            typer.echo(f"Processing: {image_file.name}")
+            try:
+                output_path = future.result()
+                typer.echo(f"  ✓ Cropped image: {output_path.name}")
+            except Exception as e:
+                typer.echo(f"  ✗ Error processing '{image_file.name}': {e}", err=True)
 
 
 def white_border_remover(
@@ -45,21 +154,7 @@ def white_border_remover(
     typer.echo(f"White threshold: {threshold}")
 
     # Find all image files
-    image_extensions = [
-        "*.jpg",
-        "*.jpeg",
-        "*.png",
-        "*.gif",
-        "*.bmp",
-        "*.tiff",
-        "*.webp",
-    ]
-    image_files = []
-    for ext in image_extensions:
-        image_files.extend(input_folder.glob(ext))
-        image_files.extend(input_folder.glob(ext.upper()))
-
-    image_files = sorted(set(image_files))  # Remove duplicates and sort
+    image_files = _find_image_files(input_folder)
 
     if not image_files:
         typer.echo(f"No image files found in '{input_folder}'.", err=True)
@@ -67,45 +162,10 @@ def white_border_remover(
 
     typer.echo(f"Found {len(image_files)} image file(s) to process...")
 
-    # Process each image
-    for image_file in image_files:
-        try:
-            typer.echo(f"Processing: {image_file.name}")
-
-            # Open and process image
-            with Image.open(image_file) as img:
-                # Convert to RGB if needed (for saving as JPEG)
-                if img.mode in ("RGBA", "LA", "P"):
-                    # Create white background for transparent images
-                    rgb_img = Image.new("RGB", img.size, (255, 255, 255))
-                    if img.mode == "P":
-                        img = img.convert("RGBA")
-                    rgb_img.paste(
-                        img, mask=img.split()[-1] if img.mode == "RGBA" else None
-                    )
-                    img = rgb_img
-                elif img.mode != "RGB":
-                    img = img.convert("RGB")
-
-                # Crop white borders
-                cropped_img = autocrop_white_border(img, threshold)
-
-                # Save the cropped image
-                output_path = output_folder / image_file.name
-                # Preserve format, but convert RGBA to RGB for JPEG
-                if output_path.suffix.lower() in [".jpg", ".jpeg"]:
-                    if cropped_img.mode == "RGBA":
-                        rgb_img = Image.new("RGB", cropped_img.size, (255, 255, 255))
-                        rgb_img.paste(cropped_img, mask=cropped_img.split()[-1])
-                        cropped_img = rgb_img
-                    cropped_img.save(output_path, "JPEG", quality=95)
-                else:
-                    cropped_img.save(output_path)
-
-                typer.echo(f"  ✓ Cropped image: {output_path.name}")
-
-        except Exception as e:
-            typer.echo(f"  ✗ Error processing '{image_file.name}': {e}", err=True)
+    # Process images concurrently
+    _crop_image_files(
+        image_files, output_folder, partial(autocrop_white_border, threshold=threshold)
+    )
 
     typer.echo(f"\nDone! Cropped images saved to: {output_folder}")
 
@@ -178,21 +238,7 @@ def grey_border_remover(
     typer.echo(f"Tolerance: {tolerance}")
 
     # Find all image files
-    image_extensions = [
-        "*.jpg",
-        "*.jpeg",
-        "*.png",
-        "*.gif",
-        "*.bmp",
-        "*.tiff",
-        "*.webp",
-    ]
-    image_files = []
-    for ext in image_extensions:
-        image_files.extend(input_folder.glob(ext))
-        image_files.extend(input_folder.glob(ext.upper()))
-
-    image_files = sorted(set(image_files))  # Remove duplicates and sort
+    image_files = _find_image_files(input_folder)
 
     if not image_files:
         typer.echo(f"No image files found in '{input_folder}'.", err=True)
@@ -200,49 +246,16 @@ def grey_border_remover(
 
     typer.echo(f"Found {len(image_files)} image file(s) to process...")
 
-    # Process each image
-    for image_file in image_files:
-        try:
-            typer.echo(f"Processing: {image_file.name}")
-
-            # Open and process image
-            with Image.open(image_file) as img:
-                # Convert to RGB if needed (for saving as JPEG)
-                if img.mode in ("RGBA", "LA", "P"):
-                    # Create white background for transparent images
-                    rgb_img = Image.new("RGB", img.size, (255, 255, 255))
-                    if img.mode == "P":
-                        img = img.convert("RGBA")
-                    rgb_img.paste(
-                        img, mask=img.split()[-1] if img.mode == "RGBA" else None
-                    )
-                    img = rgb_img
-                elif img.mode != "RGB":
-                    img = img.convert("RGB")
-
-                # Crop grey borders (left and right)
-                cropped_img = autocrop_grey_border(
-                    img, border_color, tolerance, sides="left"
-                )
-                cropped_img = autocrop_grey_border(
-                    cropped_img, border_color, tolerance, sides="right"
-                )
-
-                # Save the cropped image
-                output_path = output_folder / image_file.name
-                # Preserve format, but convert RGBA to RGB for JPEG
-                if output_path.suffix.lower() in [".jpg", ".jpeg"]:
-                    if cropped_img.mode == "RGBA":
-                        rgb_img = Image.new("RGB", cropped_img.size, (255, 255, 255))
-                        rgb_img.paste(cropped_img, mask=cropped_img.split()[-1])
-                        cropped_img = rgb_img
-                    cropped_img.save(output_path, "JPEG", quality=95)
-                else:
-                    cropped_img.save(output_path)
-
-                typer.echo(f"  ✓ Cropped image: {output_path.name}")
-
-        except Exception as e:
-            typer.echo(f"  ✗ Error processing '{image_file.name}': {e}", err=True)
+    # Process images concurrently
+    _crop_image_files(
+        image_files,
+        output_folder,
+        partial(
+            autocrop_grey_border,
+            border_color=border_color,
+            tolerance=tolerance,
+            sides="both",
+        ),
+    )
 
     typer.echo(f"\nDone! Cropped images saved to: {output_folder}")
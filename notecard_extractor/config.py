@@ -10,10 +10,14 @@ THUMBNAIL_MAX_SIZE = (200, 200)
 MEDIUM_IMAGE_MAX_SIZE = (800, 800)
 WHITE_BORDER_THRESHOLD = 250
 GREY_BORDER_TOLERANCE = 60
+WEBP_QUALITY = 85
+PNG_COMPRESS_LEVEL = 1  # zlib level for saved PNGs (level 6 is ~4x slower on scans)
 
 # Database constants
 HOME_DIR = Path.home()
 DEFAULT_DATABASE_PATH = HOME_DIR / "notecard_extractor.db"
+SQLITE_PAGE_SIZE = 16384  # Bytes per page for new databases (fewer overflow pages per blob)
 
 # Cache constants
 CACHE_MAX_AGE = 31536000  # 1 year in seconds
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024  # In-process image blob cache size
@@ -6,10 +6,32 @@ Uses SQLModel to define the database schema.
 
 from enum import Enum
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import LargeBinary, DateTime, UniqueConstraint
+from sqlalchemy import LargeBinary, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import deferred
 from typing import Optional
 from datetime import datetime
 
+# Blob columns are declared last in each model so they are stored at the end
+# of each row: SQLite keeps large values in overflow pages, and reading a
+# column that follows a blob in the row means walking the blob's overflow
+# chain. Column order is fixed when a table is created, so this only affects
+# newly created databases.
+
+
+def _deferred_blobs(*columns: Column) -> dict:
+    """
+    Build mapper arguments that defer loading of large binary columns.
+    Deferred columns are only fetched when the attribute is accessed, so
+    loading a row for its metadata does not pull image bytes into memory.
+
+    Args:
+        columns: Columns passed to Field(sa_column=...) on the model
+
+    Returns:
+        Dictionary suitable for __mapper_args__
+    """
+    return {"properties": {column.name: deferred(column) for column in columns}}
+
 
 class RecipeState(str, Enum):
     """Enumeration of possible recipe states."""
@@ -30,25 +52,33 @@ class RotationAngle(int, Enum):
     TWO_SEVENTY = 270
 
 
+_recipe_original_pdf = Column("original_pdf_data", LargeBinary)
+
+
 class Recipe(SQLModel, table=True):
     """
     Recipe table model.
     Stores recipe data including original PDF and metadata.
     Images are stored in the RecipeImage table.
+    The original PDF column is deferred and loaded on first access.
     """
 
+    __mapper_args__ = _deferred_blobs(_recipe_original_pdf)
+
     # Primary key
     id: Optional[int] = Field(default=None, primary_key=True)
 
-    # Original PDF data
-    original_pdf_data: Optional[bytes] = Field(
-        default=None, sa_column=Column(LargeBinary)
+    # Original PDF hash (unique in new databases; databases created before
+    # that keep their existing non-unique index of the same name)
+    original_pdf_sha256: Optional[str] = Field(
+        default=None, index=True, unique=True, max_length=64
     )
-    original_pdf_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
     pdf_filename: Optional[str] = Field(default=None, max_length=500)
     pdf_upload_timestamp: Optional[datetime] = Field(
         default=None, sa_column=Column(DateTime)
     )
+    # Last change to anything shown for the recipe (used for HTTP ETags)
+    updated_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime))
 
     # Recipe state
     state: RecipeState = Field(default=RecipeState.NOT_STARTED)
@@ -65,19 +95,54 @@ class Recipe(SQLModel, table=True):
     cook_time: Optional[str] = Field(default=None, max_length=100)
     notes: Optional[str] = Field(default=None)
 
+    # Blob columns (kept last)
+
+    # Original PDF data
+    original_pdf_data: Optional[bytes] = Field(
+        default=None, sa_column=_recipe_original_pdf
+    )
+
+
+_recipe_image_cropped = Column("cropped_image_data", LargeBinary)
+_recipe_image_medium = Column("medium_image_data", LargeBinary)
+_recipe_image_thumbnail = Column("thumbnail_data", LargeBinary)
+_recipe_image_cropped_webp = Column("cropped_image_webp", LargeBinary)
+_recipe_image_medium_webp = Column("medium_image_webp", LargeBinary)
+_recipe_image_thumbnail_webp = Column("thumbnail_webp", LargeBinary)
+
 
 class RecipeImage(SQLModel, table=True):
     """
     RecipeImage table model.
     Stores images extracted from PDF pages, associated with a Recipe.
     Each page of a PDF gets one RecipeImage entry.
+    Image data columns are deferred and loaded on first access.
     """
 
+    # A page is looked up by (recipe_id, pdf_page_number); a unique index makes
+    # that a single B-tree point lookup
+    __table_args__ = (
+        Index(
+            "ix_recipeimage_recipe_id_pdf_page_number",
+            "recipe_id",
+            "pdf_page_number",
+            unique=True,
+        ),
+    )
+    __mapper_args__ = _deferred_blobs(
+        _recipe_image_cropped,
+        _recipe_image_medium,
+        _recipe_image_thumbnail,
+        _recipe_image_cropped_webp,
+        _recipe_image_medium_webp,
+        _recipe_image_thumbnail_webp,
+    )
+
     # Primary key
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # Foreign key to Recipe
-    recipe_id: int = Field(foreign_key="recipe.id", index=True)
+    recipe_id: int = Field(foreign_key="recipe.id")
 
     # PDF page number (0-indexed, where 0 is the first page)
     pdf_page_number: int = Field(default=0, ge=0)
@@ -85,22 +150,46 @@ class RecipeImage(SQLModel, table=True):
     # Rotation (0, 90, 180, or 270 degrees)
     rotation: int = Field(default=0, ge=0, le=270)
 
+    # Hashes of the cropped image and its medium and thumbnail versions (not
+    # indexed: images are only ever looked up by their recipe key)
+    cropped_image_sha256: Optional[str] = Field(default=None, max_length=64)
+    medium_image_sha256: Optional[str] = Field(default=None, max_length=64)
+    thumbnail_sha256: Optional[str] = Field(default=None, max_length=64)
+
+    # Flag to mark image as unneeded
+    unneeded: bool = Field(default=False)
+
+    # Blob columns (kept last)
+
     # Cropped image data
     cropped_image_data: Optional[bytes] = Field(
-        default=None, sa_column=Column(LargeBinary)
+        default=None, sa_column=_recipe_image_cropped
     )
-    cropped_image_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
 
     # Medium and thumbnail versions
     medium_image_data: Optional[bytes] = Field(
-        default=None, sa_column=Column(LargeBinary)
+        default=None, sa_column=_recipe_image_medium
+    )
+    thumbnail_data: Optional[bytes] = Field(
+        default=None, sa_column=_recipe_image_thumbnail
     )
-    medium_image_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
-    thumbnail_data: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
-    thumbnail_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
 
-    # Flag to mark image as unneeded
-    unneeded: bool = Field(default=False)
+    # WebP encodings of the three versions above, created at ingestion and
+    # served to clients that accept image/webp
+    cropped_image_webp: Optional[bytes] = Field(
+        default=None, sa_column=_recipe_image_cropped_webp
+    )
+    medium_image_webp: Optional[bytes] = Field(
+        default=None, sa_column=_recipe_image_medium_webp
+    )
+    thumbnail_webp: Optional[bytes] = Field(
+        default=None, sa_column=_recipe_image_thumbnail_webp
+    )
+
+
+_dish_image_full = Column("image_data", LargeBinary)
+_dish_image_medium = Column("medium_image_data", LargeBinary)
+_dish_image_thumbnail = Column("thumbnail_data", LargeBinary)
 
 
 class DishImage(SQLModel, table=True):
@@ -108,13 +197,27 @@ class DishImage(SQLModel, table=True):
     DishImage table model.
     Stores dish images associated with a Recipe.
     Each recipe can have multiple dish images.
+    Image data columns are deferred and loaded on first access.
     """
 
+    # A dish image is looked up by (recipe_id, image_number)
+    __table_args__ = (
+        Index(
+            "ix_dishimage_recipe_id_image_number",
+            "recipe_id",
+            "image_number",
+            unique=True,
+        ),
+    )
+    __mapper_args__ = _deferred_blobs(
+        _dish_image_full, _dish_image_medium, _dish_image_thumbnail
+    )
+
     # Primary key
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # Foreign key to Recipe
-    recipe_id: int = Field(foreign_key="recipe.id", index=True)
+    recipe_id: int = Field(foreign_key="recipe.id")
 
     # Image number/position (1-indexed, for ordering)
     image_number: int = Field(default=1, ge=1)
@@ -122,17 +225,24 @@ class DishImage(SQLModel, table=True):
     # Rotation (0, 90, 180, or 270 degrees)
     rotation: int = Field(default=0, ge=0, le=270)
 
+    # Hashes of the full image and its medium and thumbnail versions (not
+    # indexed: images are only ever looked up by their recipe key)
+    image_sha256: Optional[str] = Field(default=None, max_length=64)
+    medium_image_sha256: Optional[str] = Field(default=None, max_length=64)
+    thumbnail_sha256: Optional[str] = Field(default=None, max_length=64)
+
+    # Blob columns (kept last)
+
     # Full image data
-    image_data: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
-    image_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
+    image_data: Optional[bytes] = Field(default=None, sa_column=_dish_image_full)
 
     # Medium and thumbnail versions
     medium_image_data: Optional[bytes] = Field(
-        default=None, sa_column=Column(LargeBinary)
+        default=None, sa_column=_dish_image_medium
+    )
+    thumbnail_data: Optional[bytes] = Field(
+        default=None, sa_column=_dish_image_thumbnail
     )
-    medium_image_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
-    thumbnail_data: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
-    thumbnail_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
 
 
 class RecipeTagList(SQLModel, table=True):
@@ -141,12 +251,11 @@ class RecipeTagList(SQLModel, table=True):
     Stores the list of available tags that can be assigned to recipes.
     """
 
-    __table_args__ = (UniqueConstraint("tag_name"),)
-
     # Primary key
     id: Optional[int] = Field(default=None, primary_key=True)
 
-    # Tag name (must be unique)
+    # Tag name (must be unique; the unique index also serves name lookups,
+    # so no separate UNIQUE constraint is declared)
     tag_name: str = Field(index=True, max_length=100, unique=True)
 
 
@@ -163,7 +272,7 @@ class RecipeTag(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # Foreign key to Recipe
-    recipe_id: int = Field(foreign_key="recipe.id", index=True)
+    recipe_id: int = Field(foreign_key="recipe.id")
 
     # Foreign key to RecipeTagList
     tag_id: int = Field(foreign_key="recipetaglist.id", index=True)
@@ -4,50 +4,114 @@ Image processing functions.
 Functions for cropping and processing images.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
 from PIL import Image
-import statistics
 
 
-def autocrop_white_border(image: Image.Image, threshold: int = 250) -> Image.Image:
+def _edge_blocks(
+    count: int, reverse: bool = False, first_size: int = 16, max_size: int = 256
+):
     """
-    Remove white borders from an image by finding the bounding box of non-white content.
+    Split a run of lines into blocks ordered inward from one edge.
+    Blocks start small and double in size, so content near the edge is
+    found after checking only a few lines, while wide margins still take
+    only a handful of block scans.
 
     Args:
-        image: PIL Image to crop
+        count: Number of lines to split
+        reverse: Order the blocks inward from the end instead of the start
+        first_size: Number of lines in the first block
+        max_size: Largest number of lines in a block
+
+    Yields:
+        Tuples of (start, end) line bounds of each block
+    """
+    offset = 0
+    size = first_size
+    while offset < count:
+        end = min(count, offset + size)
+        if reverse:
+            yield count - end, count - offset
+        else:
+            yield offset, end
+        offset = end
+        size = min(size * 2, max_size)
+
+
+def _first_content_line(
+    image: Image.Image,
+    box: tuple,
+    threshold: int,
+    vertical: bool = False,
+    reverse: bool = False,
+) -> int | None:
+    """
+    Find the first row (or column) of a region containing a non-white pixel.
+    Lines are checked a block at a time inward from the scan edge, and only
+    those blocks are converted to grayscale, so the white margin and one
+    block of content are read instead of the whole image.
+
+    Args:
+        image: PIL Image to scan
+        box: Region (left, top, right, bottom) of the image to scan
         threshold: Pixel value threshold for considering a pixel as white (0-255)
+        vertical: Scan columns from the left instead of rows from the top
+        reverse: Scan from the bottom (or right) edge instead
 
     Returns:
-        Cropped PIL Image
+        Line index within the region, or None if every line is white
     """
-    # Convert to grayscale if needed
-    if image.mode != "L":
-        gray = image.convert("L")
-    else:
-        gray = image
-
-    # Get image data
-    pixels = gray.load()
-    width, height = gray.size
-
-    # Find bounding box of non-white content
-    top = height
-    bottom = 0
-    left = width
-    right = 0
-
-    # Scan for non-white pixels
-    for y in range(height):
-        for x in range(width):
-            pixel_value = pixels[x, y]
-            if pixel_value < threshold:  # Non-white pixel found
-                top = min(top, y)
-                bottom = max(bottom, y)
-                left = min(left, x)
-                right = max(right, x)
-
-    # If no content found, return original image
-    if top == height or left == width:
-        return image
+    left, top, right, bottom = box
+    count = right - left if vertical else bottom - top
+    for start, end in _edge_blocks(count, reverse):
+        if vertical:
+            block_box = (left + start, top, left + end, bottom)
+        else:
+            block_box = (left, top + start, right, top + end)
+
+        gray = image.crop(block_box)
+        if gray.mode != "L":
+            gray = gray.convert("L")
+
+        # A line has content when its darkest pixel is below the threshold
+        darkest = np.asarray(gray).min(axis=0 if vertical else 1)
+        content_lines = np.flatnonzero(darkest < threshold)
+        if content_lines.size:
+            return start + int(content_lines[-1 if reverse else 0])
+    return None
+
+
+def find_white_border_box(image: Image.Image, threshold: int = 250) -> tuple | None:
+    """
+    Find the padded bounding box of non-white content in an image.
+
+    Args:
+        image: PIL Image; pixels are compared in grayscale ("L") values
+        threshold: Pixel value threshold for considering a pixel as white (0-255)
+
+    Returns:
+        Crop box (left, top, right, bottom), or None if the image is entirely white
+    """
+    width, height = image.size
+
+    # Find bounding box of non-white content by scanning inward from each edge
+    top = _first_content_line(image, (0, 0, width, height), threshold)
+
+    if top is None:
+        return None
+
+    bottom = _first_content_line(image, (0, 0, width, height), threshold, reverse=True)
+
+    # Only rows between top and bottom can contain content columns
+    content_rows = (0, top, width, bottom + 1)
+    left = _first_content_line(image, content_rows, threshold, vertical=True)
+    right = _first_content_line(
+        image, content_rows, threshold, vertical=True, reverse=True
+    )
 
     # Add small padding to avoid cutting too close
     padding = 2
@@ -56,278 +120,604 @@ def autocrop_white_border(image: Image.Image, threshold: int = 250) -> Image.Ima
     left = max(0, left - padding)
     right = min(width, right + padding + 1)
 
-    # Crop the image
-    return image.crop((left, top, right, bottom))
+    return left, top, right, bottom
 
 
-def autocrop_grey_border(
-    image: Image.Image,
-    border_color: tuple = None,
-    tolerance: int = 60,
-    sides: str = "left",
-) -> Image.Image:
+def autocrop_white_border(image: Image.Image, threshold: int = 250) -> Image.Image:
     """
-    Remove greyish margins from specified side of an image.
-    Samples edge pixels to determine margin color, then scans inward until finding
-    non-margin content. Removes only the specified side (left, right, top, or bottom).
+    Remove white borders from an image by finding the bounding box of non-white content.
 
     Args:
         image: PIL Image to crop
-        border_color: RGB color of the margins to remove. If None, auto-detects from edges.
-        tolerance: Color distance tolerance for matching margin pixels (0-255)
-        sides: Which side to process. Options: "left", "right", "top", "bottom" (default: "left")
+        threshold: Pixel value threshold for considering a pixel as white (0-255)
 
     Returns:
-        Cropped PIL Image with specified margin removed
+        Cropped PIL Image
+    """
+    # Only the scanned blocks are converted to grayscale
+    box = find_white_border_box(image, threshold)
+
+    # If no content found, or content reaches every edge, return original image
+    if box is None or box == (0, 0, *image.size):
+        return image
+
+    # Crop the image
+    return image.crop(box)
+
+
+def _distances_sq(pixels: np.ndarray, tables: np.ndarray) -> np.ndarray:
+    """
+    Squared color distances of pixels, summed from per-channel lookup tables.
+
+    Args:
+        pixels: (..., 3 or 4) uint8 array of pixels (any alpha channel is ignored)
+        tables: (3, 256) int32 array of squared differences for each channel value
+
+    Returns:
+        int32 array of squared distances with the pixels' leading shape
+    """
+    # take() gathers straight from the flat tables without the general fancy
+    # indexing machinery, making the lookups about a third faster
+    return (
+        tables[0].take(pixels[..., 0])
+        + tables[1].take(pixels[..., 1])
+        + tables[2].take(pixels[..., 2])
+    )
+
+
+def _margin_distance_tables(margin_color: tuple) -> np.ndarray:
+    """
+    Build the per-channel lookup tables of squared differences from a margin color.
+    Squared differences are read from 256-entry tables indexed by the uint8
+    pixel values, which is about twice as fast as widening the samples and
+    subtracting.
+
+    Args:
+        margin_color: RGB color of the margin
+
+    Returns:
+        (3, 256) int32 array of squared differences for each channel value
+    """
+    margin = np.asarray(margin_color[:3], dtype=np.int16)
+    return (np.arange(256, dtype=np.int32)[:, None] - margin).T ** 2
+
+
+def _margin_pixel_mask(
+    samples: np.ndarray,
+    margin_color: tuple,
+    tolerance: int,
+    tables: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Compute which sampled pixels match the margin color.
+    A pixel matches when its Euclidean distance to the margin color is within tolerance.
+
+    Args:
+        samples: (rows, W, 3) RGB or (rows, W, 4) RGBA uint8 array of sampled rows.
+            For RGBA input, pixels exactly equal to the margin color are matched
+            with a single uint32 compare before any distances are computed.
+        margin_color: RGB color of the margin
+        tolerance: Color distance tolerance for matching margin pixels
+        tables: Lookup tables from _margin_distance_tables for margin_color,
+            if already built
+
+    Returns:
+        (rows, W) boolean array, True where the pixel is margin
     """
-    # Convert to RGB if needed
-    if image.mode != "RGB":
-        img_rgb = image.convert("RGB")
+    if tables is None:
+        tables = _margin_distance_tables(margin_color)
+    # Squares are compared against the squared tolerance to avoid a sqrt per pixel
+    limit = tolerance * tolerance
+
+    if samples.shape[-1] == 4:
+        reference = np.array([*margin_color[:3], 255], dtype=np.uint8).view(np.uint32)
+        packed = np.ascontiguousarray(samples).view(np.uint32)[..., 0]
+        is_margin = packed == reference[0]
+        pending = ~is_margin
+        is_margin[pending] = _distances_sq(samples[pending], tables) <= limit
     else:
-        img_rgb = image
+        is_margin = _distances_sq(samples, tables) <= limit
+
+    return is_margin
 
-    # Get image data
-    pixels = img_rgb.load()
-    width, height = img_rgb.size
 
-    # Calculate color distance function
-    def color_distance(rgb1, rgb2):
-        """Calculate Euclidean distance between two RGB colors."""
-        return sum((a - b) ** 2 for a, b in zip(rgb1, rgb2)) ** 0.5
+def compute_column_margin_ratios(
+    samples: np.ndarray, margin_color: tuple, tolerance: int
+) -> np.ndarray:
+    """
+    Compute the fraction of sampled pixels in each column that match the margin color.
+    A pixel matches when its Euclidean distance to the margin color is within tolerance.
+
+    Args:
+        samples: (rows, W, 3) RGB or (rows, W, 4) RGBA uint8 array of sampled rows
+        margin_color: RGB color of the margin
+        tolerance: Color distance tolerance for matching margin pixels
+
+    Returns:
+        Float array of length W with the margin ratio (0.0-1.0) of each column
+    """
+    if not len(samples):
+        return np.ones(samples.shape[1])
+
+    return _margin_pixel_mask(samples, margin_color, tolerance).mean(axis=0)
+
+
+def _content_columns(
+    samples: np.ndarray,
+    margin_color: tuple,
+    tolerance: int,
+    tables: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Find the columns containing at least one non-margin sampled pixel.
+    Reduces the margin mask with a boolean all() instead of computing
+    floating point ratios, since scans only need to know if a column is
+    entirely margin.
+
+    Args:
+        samples: (rows, W, 3) uint8 array of sampled rows
+        margin_color: RGB color of the margin
+        tolerance: Color distance tolerance for matching margin pixels
+        tables: Lookup tables from _margin_distance_tables for margin_color,
+            if already built
+
+    Returns:
+        Sorted array of column indices with content
+    """
+    if not len(samples):
+        return np.empty(0, dtype=np.intp)
 
+    is_margin = _margin_pixel_mask(samples, margin_color, tolerance, tables)
+    return np.flatnonzero(~is_margin.all(axis=0))
+
+
+def _first_content_column(
+    samples: np.ndarray,
+    margin_color: tuple,
+    tolerance: int,
+    reverse: bool = False,
+) -> int | None:
+    """
+    Find the first column (or last, if reverse) containing non-margin pixels.
+    Columns are checked a block at a time from the scan edge, so narrow
+    margins are found without computing distances for the rest of the image.
+
+    Args:
+        samples: (rows, W, 3) uint8 array of sampled rows
+        margin_color: RGB color of the margin
+        tolerance: Color distance tolerance for matching margin pixels
+        reverse: Scan from the right edge instead of the left
+
+    Returns:
+        Column index within samples, or None if every column is margin
+    """
+    width = samples.shape[1]
+    # The lookup tables are built once and shared by every block
+    tables = _margin_distance_tables(margin_color)
+    for start, end in _edge_blocks(width, reverse, first_size=64):
+        content_columns = _content_columns(
+            samples[:, start:end], margin_color, tolerance, tables
+        )
+        if content_columns.size:
+            return start + int(content_columns[-1 if reverse else 0])
+    return None
+
+
+def _edge_margin_color(block: np.ndarray, fallback: tuple) -> tuple:
+    """
+    Average color of a sampled edge block, truncated to integers.
+
+    Args:
+        block: (rows, columns, 3) uint8 array of sampled edge pixels
+        fallback: Color to use when the block is empty
+
+    Returns:
+        RGB color tuple
+    """
+    if not block.size:
+        return fallback
+    # Reduce over both pixel axes directly; reshaping a strided view of the
+    # image into a pixel list would copy it first
+    return tuple(int(c) for c in block.mean(axis=(0, 1)))
+
+
+def _grey_scan_rows(height: int) -> tuple[slice, slice]:
+    """
+    Choose the rows sampled when looking for greyish side margins.
+
+    Args:
+        height: Height of the image (or cropped region) in pixels
+
+    Returns:
+        Tuple of (edge_rows, sample_rows): rows used to determine the margin
+        colors, and rows checked in each column when scanning for content
+    """
     # Exclude top and bottom edges (often have different colors like headers/footers)
     edge_exclusion = max(10, height // 20)  # Exclude ~5% from top and bottom
     scan_y_start = edge_exclusion
     scan_y_end = height - edge_exclusion
 
-    # Sample first 20 pixels from left edge to determine left margin color
-    left_margin_pixels = []
+    edge_rows = slice(
+        scan_y_start, scan_y_end, max(1, (scan_y_end - scan_y_start) // 20)
+    )
+    sample_rows = slice(
+        scan_y_start, scan_y_end, max(1, (scan_y_end - scan_y_start) // 30)
+    )
+    return edge_rows, sample_rows
+
+
+def _grey_border_columns(
+    edge_samples: np.ndarray,
+    scan_samples: np.ndarray,
+    border_color: tuple = None,
+    tolerance: int = 60,
+    sides: str = "both",
+) -> tuple[int, int]:
+    """
+    Find the padded left and right content edges from sampled rows.
+
+    Args:
+        edge_samples: (rows, W, 3) uint8 array of the rows chosen as edge_rows
+        scan_samples: (rows, W, 3) uint8 array of the rows chosen as sample_rows
+        border_color: Fallback margin color when no edge pixels can be sampled
+        tolerance: Color distance tolerance for matching margin pixels (0-255)
+        sides: Which side margins to find: "left", "right" or "both"
+
+    Returns:
+        Tuple of (left, right) column bounds to crop to
+    """
+    width = scan_samples.shape[1]
+
+    # Sample the first and last 20 columns to determine the margin colors
     sample_width = min(20, width)
-    for x in range(sample_width):
-        for y in range(
-            scan_y_start, scan_y_end, max(1, (scan_y_end - scan_y_start) // 20)
-        ):
-            left_margin_pixels.append(pixels[x, y])
-
-    if left_margin_pixels:
-        r_vals = [p[0] for p in left_margin_pixels]
-        g_vals = [p[1] for p in left_margin_pixels]
-        b_vals = [p[2] for p in left_margin_pixels]
-        left_margin_color = (
-            int(statistics.mean(r_vals)),
-            int(statistics.mean(g_vals)),
-            int(statistics.mean(b_vals)),
-        )
-    else:
-        # Fallback to provided border_color or default
-        left_margin_color = border_color if border_color else (240, 240, 240)
-
-    # Sample first 20 pixels from right edge to determine right margin color
-    right_margin_pixels = []
-    for x in range(max(0, width - sample_width), width):
-        for y in range(
-            scan_y_start, scan_y_end, max(1, (scan_y_end - scan_y_start) // 20)
-        ):
-            right_margin_pixels.append(pixels[x, y])
-
-    if right_margin_pixels:
-        r_vals = [p[0] for p in right_margin_pixels]
-        g_vals = [p[1] for p in right_margin_pixels]
-        b_vals = [p[2] for p in right_margin_pixels]
-        right_margin_color = (
-            int(statistics.mean(r_vals)),
-            int(statistics.mean(g_vals)),
-            int(statistics.mean(b_vals)),
-        )
-    else:
-        # Fallback to left margin color or provided border_color
-        right_margin_color = (
-            left_margin_color
-            if left_margin_pixels
-            else (border_color if border_color else (240, 240, 240))
-        )
+    fallback_color = border_color if border_color else (240, 240, 240)
 
-    # Normalize sides parameter
-    side = sides.lower()
+    padding = 2
+    left = 0
+    right = width
 
-    if side == "left":
+    if sides in ("left", "both"):
         # Scan from left edge inward until we find a column with non-margin content
         # Scan 80% of image width to catch left borders
         scan_limit = int(width * 0.8)  # Scan 80% from left edge
+        left_margin_color = _edge_margin_color(
+            edge_samples[:, :sample_width], fallback_color
+        )
+
+        # Stop at the first column with content; a column is margin only if
+        # all sampled pixels are within tolerance of the margin color
+        first = _first_content_column(
+            scan_samples[:, :scan_limit], left_margin_color, tolerance
+        )
+        left = first if first is not None else 0
+
+    if sides in ("right", "both"):
+        # The right margin is found as if the left margin had already been
+        # cropped away (padding included), matching a left crop followed by
+        # a right crop of the result
+        cropped_left = max(0, left - padding)
+        cropped_width = width - cropped_left
 
-        left = 0
-        # Scan from left edge, ensuring we check at least 80% from left
-        for x in range(scan_limit):
-            # Check if this column has only margin color (within tolerance)
-            all_margin = True
-            sample_size = min(30, scan_y_end - scan_y_start)
-            step = max(1, (scan_y_end - scan_y_start) // sample_size)
-
-            for y in range(scan_y_start, scan_y_end, step):
-                pixel_rgb = pixels[x, y]
-                distance = color_distance(pixel_rgb, left_margin_color)
-                if distance > tolerance:
-                    # Found a non-margin pixel - this column has content
-                    all_margin = False
-                    break
-
-            if not all_margin:
-                # Found content, stop here
-                left = x
-                break
-
-        # Add small padding to avoid cutting too close
-        padding = 2
-        left = max(0, left - padding)
-
-        # Crop only left margin, keep full width and height
-        return image.crop((left, 0, width, height))
-
-    elif side == "right":
         # Scan from right edge inward until we find a column with non-margin content
         # Scan 80% of image width from the right edge to catch right borders
-        min_scan_distance = int(width * 0.8)  # Scan 80% from right edge
-        max_scan_start = (
-            width - min_scan_distance
-        )  # Maximum scan_start to ensure we scan 80%
-
-        right = width
-        scan_start = max_scan_start
-        for x in range(width - 1, scan_start - 1, -1):
-            # Check if this column has only margin color (within tolerance)
-            all_margin = True
-            sample_size = min(30, scan_y_end - scan_y_start)
-            step = max(1, (scan_y_end - scan_y_start) // sample_size)
-
-            for y in range(scan_y_start, scan_y_end, step):
-                pixel_rgb = pixels[x, y]
-                distance = color_distance(pixel_rgb, right_margin_color)
-                if distance > tolerance:
-                    # Found a non-margin pixel - this column has content
-                    all_margin = False
-                    break
-
-            if not all_margin:
-                # Found content, stop here (content extends to x+1)
-                right = x + 1
-                break
-
-        # Add small padding to avoid cutting too close
-        padding = 2
-        right = min(width, right + padding)
-
-        # Crop only right margin, keep full height
-        return image.crop((0, 0, right, height))
-
-    elif side == "top":
-        # Scan from top edge downward until we find a row with non-margin content
-        # Sample first 20 pixels from top edge to determine top margin color
-        top_margin_pixels = []
-        sample_height = min(20, height)
-        edge_exclusion_x = max(10, width // 20)  # Exclude ~5% from left and right
-        scan_x_start = edge_exclusion_x
-        scan_x_end = width - edge_exclusion_x
-
-        for y in range(sample_height):
-            for x in range(
-                scan_x_start, scan_x_end, max(1, (scan_x_end - scan_x_start) // 20)
-            ):
-                top_margin_pixels.append(pixels[x, y])
-
-        if top_margin_pixels:
-            r_vals = [p[0] for p in top_margin_pixels]
-            g_vals = [p[1] for p in top_margin_pixels]
-            b_vals = [p[2] for p in top_margin_pixels]
-            top_margin_color = (
-                int(statistics.mean(r_vals)),
-                int(statistics.mean(g_vals)),
-                int(statistics.mean(b_vals)),
-            )
+        min_scan_distance = int(cropped_width * 0.8)  # Scan 80% from right edge
+        scan_start = width - min_scan_distance
+        right_margin_color = _edge_margin_color(
+            edge_samples[:, width - min(sample_width, cropped_width) :],
+            fallback_color,
+        )
+
+        last = _first_content_column(
+            scan_samples[:, scan_start:], right_margin_color, tolerance, reverse=True
+        )
+        # Stop at the last column with content (content extends to x+1)
+        if last is not None:
+            right = scan_start + last + 1
+
+    # Add small padding to avoid cutting too close
+    left = max(0, left - padding)
+    right = min(width, right + padding)
+
+    return left, right
+
+
+def find_grey_border_columns(
+    arr: np.ndarray,
+    border_color: tuple = None,
+    tolerance: int = 60,
+    sides: str = "both",
+) -> tuple[int, int]:
+    """
+    Find the padded left and right content edges inside greyish side margins.
+    Samples edge pixels to determine each margin color, then scans inward until
+    finding non-margin content.
+
+    Args:
+        arr: (H, W, 3) uint8 RGB array (may be a view into a larger image)
+        border_color: Fallback margin color when no edge pixels can be sampled
+        tolerance: Color distance tolerance for matching margin pixels (0-255)
+        sides: Which side margins to find: "left", "right" or "both"
+
+    Returns:
+        Tuple of (left, right) column bounds to crop to
+    """
+    edge_rows, sample_rows = _grey_scan_rows(arr.shape[0])
+    return _grey_border_columns(
+        arr[edge_rows], arr[sample_rows], border_color, tolerance, sides
+    )
+
+
+def _sample_lines(
+    image: Image.Image, box: tuple, lines: slice, vertical: bool = False
+) -> np.ndarray:
+    """
+    Copy selected rows (or columns) of a region of an image into an RGB array.
+    Only the sampled lines are converted and copied, instead of the whole image.
+
+    Args:
+        image: PIL Image to sample
+        box: Region (left, top, right, bottom) of the image to sample
+        lines: Rows of the region to sample, or columns if vertical
+        vertical: Sample columns instead of rows
+
+    Returns:
+        (lines, length, 3) uint8 array; columns are returned as rows
+    """
+    left, top, right, bottom = box
+    if vertical:
+        length = bottom - top
+        indices = range(right - left)[lines]
+        origin, extent = left, image.width
+    else:
+        length = right - left
+        indices = range(bottom - top)[lines]
+        origin, extent = top, image.height
+    if not indices or not length:
+        return np.empty((len(indices), length, 3), dtype=np.uint8)
+
+    # A nearest-neighbour resize reads line floor(start + (i + 0.5) * step)
+    # of its box for output line i, so a box starting (step - 1) / 2 lines
+    # before the first sampled line picks out exactly the sampled lines in
+    # one call instead of one crop per line (the half-line offsets are exact
+    # in floating point)
+    step = indices.step if len(indices) > 1 else 1
+    start = origin + indices[0] - (step - 1) / 2
+    end = start + len(indices) * step
+    if step > 0 and start >= 0 and end <= extent:
+        if vertical:
+            sampled = image.resize(
+                (len(indices), length),
+                Image.Resampling.NEAREST,
+                box=(start, top, end, bottom),
+            ).transpose(Image.Transpose.TRANSPOSE)
         else:
-            top_margin_color = border_color if border_color else (240, 240, 240)
-
-        # Scan 80% of image height from the top edge
-        scan_limit = int(height * 0.8)
-
-        top = 0
-        for y in range(scan_limit):
-            # Check if this row has only margin color (within tolerance)
-            all_margin = True
-            sample_size = min(30, scan_x_end - scan_x_start)
-            step = max(1, (scan_x_end - scan_x_start) // sample_size)
-
-            for x in range(scan_x_start, scan_x_end, step):
-                pixel_rgb = pixels[x, y]
-                distance = color_distance(pixel_rgb, top_margin_color)
-                if distance > tolerance:
-                    all_margin = False
-                    break
-
-            if not all_margin:
-                top = y
-                break
-
-        padding = 2
-        top = max(0, top - padding)
-
-        # Crop only top margin, keep full width
-        return image.crop((0, top, width, height))
-
-    elif side == "bottom":
-        # Scan from bottom edge upward until we find a row with non-margin content
-        # Sample last 20 pixels from bottom edge to determine bottom margin color
-        bottom_margin_pixels = []
-        sample_height = min(20, height)
-        edge_exclusion_x = max(10, width // 20)  # Exclude ~5% from left and right
-        scan_x_start = edge_exclusion_x
-        scan_x_end = width - edge_exclusion_x
-
-        for y in range(max(0, height - sample_height), height):
-            for x in range(
-                scan_x_start, scan_x_end, max(1, (scan_x_end - scan_x_start) // 20)
-            ):
-                bottom_margin_pixels.append(pixels[x, y])
-
-        if bottom_margin_pixels:
-            r_vals = [p[0] for p in bottom_margin_pixels]
-            g_vals = [p[1] for p in bottom_margin_pixels]
-            b_vals = [p[2] for p in bottom_margin_pixels]
-            bottom_margin_color = (
-                int(statistics.mean(r_vals)),
-                int(statistics.mean(g_vals)),
-                int(statistics.mean(b_vals)),
+            sampled = image.resize(
+                (length, len(indices)),
+                Image.Resampling.NEAREST,
+                box=(left, start, right, end),
             )
+        if sampled.mode != "RGB":
+            sampled = sampled.convert("RGB")
+        return np.asarray(sampled)
+
+    # Lines too close to the image edge for the resize box are cropped one
+    # at a time, each copied straight into its row of the result
+    samples = np.empty((len(indices), length, 3), dtype=np.uint8)
+    convert = image.mode != "RGB"
+    for i, line in enumerate(indices):
+        if vertical:
+            line_box = (left + line, top, left + line + 1, bottom)
         else:
-            bottom_margin_color = border_color if border_color else (240, 240, 240)
-
-        # Scan 80% of image height from the bottom edge
-        min_scan_distance = int(height * 0.8)
-        max_scan_start = height - min_scan_distance
-
-        bottom = height
-        scan_start = max_scan_start
-        for y in range(height - 1, scan_start - 1, -1):
-            # Check if this row has only margin color (within tolerance)
-            all_margin = True
-            sample_size = min(30, scan_x_end - scan_x_start)
-            step = max(1, (scan_x_end - scan_x_start) // sample_size)
-
-            for x in range(scan_x_start, scan_x_end, step):
-                pixel_rgb = pixels[x, y]
-                distance = color_distance(pixel_rgb, bottom_margin_color)
-                if distance > tolerance:
-                    all_margin = False
-                    break
-
-            if not all_margin:
-                bottom = y + 1
-                break
-
-        padding = 2
-        bottom = min(height, bottom + padding)
-
-        # Crop only bottom margin, keep full width
-        return image.crop((0, 0, width, bottom))
+            line_box = (left, top + line, right, top + line + 1)
+        cropped = image.crop(line_box)
+        if convert:
+            cropped = cropped.convert("RGB")
+        samples[i] = np.asarray(cropped).reshape(length, 3)
+    return samples
+
+
+def find_grey_border_lines(
+    image: Image.Image,
+    box: tuple,
+    border_color: tuple = None,
+    tolerance: int = 60,
+    sides: str = "both",
+    vertical: bool = False,
+) -> tuple[int, int]:
+    """
+    Find the greyish margins of a region of an image from sampled lines.
+    Equivalent to find_grey_border_columns on the region's RGB array (or its
+    transpose, if vertical), without converting or copying the whole image.
+
+    Args:
+        image: PIL Image to scan
+        box: Region (left, top, right, bottom) of the image to scan
+        border_color: Fallback margin color when no edge pixels can be sampled
+        tolerance: Color distance tolerance for matching margin pixels (0-255)
+        sides: Which margins to find: "left", "right" or "both" (top and
+            bottom margins, if vertical)
+        vertical: Find top and bottom margins instead of left and right
+
+    Returns:
+        Tuple of content bounds within the region: (left, right), or
+        (top, bottom) if vertical
+    """
+    left, top, right, bottom = box
+    edge_rows, sample_rows = _grey_scan_rows(right - left if vertical else bottom - top)
+    return _grey_border_columns(
+        _sample_lines(image, box, edge_rows, vertical),
+        _sample_lines(image, box, sample_rows, vertical),
+        border_color,
+        tolerance,
+        sides,
+    )
+
+
+def autocrop_grey_border(
+    image: Image.Image,
+    border_color: tuple = None,
+    tolerance: int = 60,
+    sides: str = "left",
+) -> Image.Image:
+    """
+    Remove greyish margins from specified side of an image.
+    Samples edge pixels to determine margin color, then scans inward until finding
+    non-margin content. Removes only the specified side (left, right, top, or bottom),
+    or both side margins at once.
+
+    Args:
+        image: PIL Image to crop
+        border_color: RGB color of the margins to remove. If None, auto-detects from edges.
+        tolerance: Color distance tolerance for matching margin pixels (0-255)
+        sides: Which side to process. Options: "left", "right", "both" (left and
+            right in a single pass), "top", "bottom" (default: "left")
+
+    Returns:
+        Cropped PIL Image with specified margin removed
+    """
+    width, height = image.size
+
+    # Normalize sides parameter
+    side = sides.lower()
+
+    # Only the sampled rows (or columns) are converted to RGB and copied
+    full_box = (0, 0, width, height)
+
+    if side in ("left", "right", "both"):
+        left, right = find_grey_border_lines(
+            image, full_box, border_color, tolerance, side
+        )
+
+        # Crop only side margins, keep full height (no copy if nothing to remove)
+        if (left, right) == (0, width):
+            return image
+        return image.crop((left, 0, right, height))
+
+    elif side in ("top", "bottom"):
+        # The top and bottom margins are the left and right margins of the
+        # transposed image, so the same sampling and scan constants apply:
+        # margin colors come from the first and last 20 rows, and rows are
+        # scanned inward over 80% of the height
+        top, bottom = find_grey_border_lines(
+            image,
+            full_box,
+            border_color,
+            tolerance,
+            "left" if side == "top" else "right",
+            vertical=True,
+        )
+
+        # Crop only the top or bottom margin, keep full width (no copy if
+        # nothing to remove)
+        if (top, bottom) == (0, height):
+            return image
+        return image.crop((0, top, width, bottom))
     else:
         # Invalid side parameter, return original
         return image
+
+
+def autocrop_all_sides(
+    image: Image.Image, border_color: tuple = None, tolerance: int = 60
+) -> Image.Image:
+    """
+    Remove greyish margins from all four sides of an image with a single crop.
+    Equivalent to autocrop_grey_border with sides="both", then "top", then
+    "bottom", each applied to the previous result, but every margin is found
+    on the original image and the pixels are copied once.
+
+    Args:
+        image: PIL Image to crop
+        border_color: Fallback margin color when no edge pixels can be sampled
+        tolerance: Color distance tolerance for matching margin pixels (0-255)
+
+    Returns:
+        Cropped PIL Image
+    """
+    width, height = image.size
+
+    left, right = find_grey_border_lines(
+        image, (0, 0, width, height), border_color, tolerance, "both"
+    )
+    # Top and bottom margins are found within the side margins, as they
+    # would be on the images cropped by the previous steps
+    top, _ = find_grey_border_lines(
+        image, (left, 0, right, height), border_color, tolerance, "left", True
+    )
+    _, bottom = find_grey_border_lines(
+        image, (left, top, right, height), border_color, tolerance, "right", True
+    )
+    box = (left, top, right, top + bottom)
+
+    # Crop once (no copy if nothing to remove)
+    if box == (0, 0, width, height):
+        return image
+    return image.crop(box)
+
+
+def autocrop_borders(
+    image: Image.Image, white_threshold: int = 250, grey_tolerance: int = 60
+) -> Image.Image:
+    """
+    Remove white borders and then greyish left and right margins in one pass.
+    Equivalent to autocrop_white_border followed by autocrop_grey_border with
+    sides="both", but both crop boxes are found on the image itself and the
+    pixels are copied by a single crop.
+
+    Args:
+        image: PIL Image to crop
+        white_threshold: Pixel value threshold for considering a pixel as white (0-255)
+        grey_tolerance: Color distance tolerance for matching margin pixels (0-255)
+
+    Returns:
+        Cropped PIL Image
+    """
+    # The image is not converted to RGB as a whole: the scans convert only
+    # the blocks and lines they read, which gives the same boxes for any mode
+    width, height = image.size
+
+    # White border box of the whole image
+    box = find_white_border_box(image, white_threshold)
+    left, top, right, bottom = box if box is not None else (0, 0, width, height)
+
+    # Grey side margins within the white crop, found from rows sampled
+    # inside it rather than an array of the whole image
+    grey_left, grey_right = find_grey_border_lines(
+        image, (left, top, right, bottom), tolerance=grey_tolerance
+    )
+    box = (left + grey_left, top, left + grey_right, bottom)
+
+    # Crop once (no copy if nothing to remove)
+    if box == (0, 0, width, height):
+        return image
+    return image.crop(box)
+
+
+def autocrop_batch(
+    images: list[Image.Image],
+    white_threshold: int = 250,
+    grey_tolerance: int = 60,
+    max_workers: int | None = None,
+) -> list[Image.Image]:
+    """
+    Apply autocrop_borders to many images in parallel.
+    Pillow decoding and the NumPy border scans release the GIL, so a thread
+    pool scales across cores without pickling full-resolution pages to
+    worker processes.
+
+    Args:
+        images: PIL Images to crop
+        white_threshold: Pixel value threshold for considering a pixel as white (0-255)
+        grey_tolerance: Color distance tolerance for matching margin pixels (0-255)
+        max_workers: Number of worker threads (default: number of CPUs)
+
+    Returns:
+        Cropped PIL Images, in the same order as the input
+    """
+    crop = partial(
+        autocrop_borders,
+        white_threshold=white_threshold,
+        grey_tolerance=grey_tolerance,
+    )
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        return list(pool.map(crop, images))
@@ -4,10 +4,92 @@ PDF extraction functionality.
 Extracts images from PDF files.
 """
 
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import typer
 from pypdf import PdfReader
-from notecard_extractor.utils.pdf_utils import extract_images_from_pdf_page
+from notecard_extractor.config import PNG_COMPRESS_LEVEL
+from notecard_extractor.utils.pdf_utils import extract_image_and_data_from_pdf_page
+
+
+def _extract_pdf_images(pdf_file: Path, output_folder: Path) -> list[tuple[str, bool]]:
+    """
+    Save the first image of each page of a PDF to the output folder.
+    Progress is returned rather than printed so PDFs can be processed
+    concurrently while the report keeps file order.
+
+    Args:
+        pdf_file: PDF file to process
+        output_folder: Folder to save the extracted images to
+
+    Returns:
+        List of (message, is_error) report lines
+    """
+    lines = [(f"Processing: {pdf_file.name}", False)]
+    try:
+        # Memory-map the PDF so pypdf reads objects straight from the page
+        # cache instead of first copying the whole file into memory
+        with (
+            open(pdf_file, "rb") as pdf_handle,
+            mmap.mmap(pdf_handle.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map,
+        ):
+            # Read PDF and extract images
+            reader = PdfReader(pdf_map)
+            images_found = False
+
+            # Iterate through pages to extract one image per page
+            for page_num, page in enumerate(reader.pages):
+                # Use shared utility to extract image from page
+                extracted = extract_image_and_data_from_pdf_page(page, page_num)
+
+                if extracted is None:
+                    lines.append(
+                        (
+                            f"  ⚠ No image found on page {page_num + 1} of '{pdf_file.name}'",
+                            True,
+                        )
+                    )
+                    continue
+
+                try:
+                    # Determine file extension (default to PNG)
+                    ext = ".png"
+
+                    # Save image with _page# before the suffix
+                    output_path = output_folder / f"{pdf_file.stem}_page{page_num}{ext}"
+                    image, image_data = extracted
+                    if image.format == "PNG":
+                        # The image data is already a PNG file, so write it as-is
+                        # instead of decoding and re-encoding the same pixels
+                        output_path.write_bytes(image_data)
+                    else:
+                        # Fast zlib level: the PNG is lossless either way
+                        image.save(
+                            output_path, "PNG", compress_level=PNG_COMPRESS_LEVEL
+                        )
+                    lines.append(
+                        (
+                            f"  ✓ Extracted image from page {page_num + 1}: {output_path.name}",
+                            False,
+                        )
+                    )
+                    images_found = True
+
+                except Exception as e:
+                    lines.append(
+                        (f"  ⚠ Error saving image from page {page_num + 1}: {e}", True)
+                    )
+                    continue
+
+            if not images_found:
+                lines.append((f"  ⚠ No images found in '{pdf_file.name}'", True))
+
+    except Exception as e:
+        lines.append((f"  ✗ Error processing '{pdf_file.name}': {e}", True))
+
+    return lines
 
 
 def extract_notecards(
@@ -48,52 +130,16 @@ def extract_notecards(
 
     typer.echo(f"Found {len(pdf_files)} PDF file(s) to process...")
 
-    # Process each PDF
-    for pdf_file in pdf_files:
-        try:
-            typer.echo(f"Processing: {pdf_file.name}")
-
-            # Read PDF and extract images
-            reader = PdfReader(pdf_file)
-            images_found = False
-
-            # Iterate through pages to extract one image per page
-            for page_num, page in enumerate(reader.pages):
-                # Use shared utility to extract image from page
-                image = extract_images_from_pdf_page(page, page_num)
-                
-                if image is None:
-                    typer.echo(
-                        f"  ⚠ No image found on page {page_num + 1} of '{pdf_file.name}'",
-                        err=True,
-                    )
-                    continue
-
-                try:
-                    # Determine file extension (default to PNG)
-                    ext = ".png"
-
-                    # Save image with _page# before the suffix
-                    output_path = (
-                        output_folder / f"{pdf_file.stem}_page{page_num}{ext}"
-                    )
-                    image.save(output_path)
-                    typer.echo(
-                        f"  ✓ Extracted image from page {page_num + 1}: {output_path.name}"
-                    )
-                    images_found = True
-
-                except Exception as e:
-                    typer.echo(
-                        f"  ⚠ Error saving image from page {page_num + 1}: {e}",
-                        err=True,
-                    )
-                    continue
-
-            if not images_found:
-                typer.echo(f"  ⚠ No images found in '{pdf_file.name}'", err=True)
-
-        except Exception as e:
-            typer.echo(f"  ✗ Error processing '{pdf_file.name}': {e}", err=True)
+    # Process PDFs concurrently, reporting progress in file order. Each PDF
+    # gets its own reader, and Pillow releases the GIL while decoding and
+    # encoding, so the page images of different PDFs are saved in parallel.
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = [
+            executor.submit(_extract_pdf_images, pdf_file, output_folder)
+            for pdf_file in pdf_files
+        ]
+        for future in futures:
+            for message, is_error in future.result():
+                typer.echo(message, err=is_error)
 
     typer.echo(f"\nDone! Images saved to: {output_folder}")
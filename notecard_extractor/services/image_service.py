@@ -12,7 +12,7 @@ from notecard_extractor.utils.image_utils import (
     create_medium_image,
     calculate_image_hash,
 )
-from notecard_extractor.image_processing import autocrop_white_border, autocrop_grey_border
+from notecard_extractor.image_processing import autocrop_borders
 from notecard_extractor.config import (
     THUMBNAIL_MAX_SIZE,
     MEDIUM_IMAGE_MAX_SIZE,
@@ -39,15 +39,11 @@ def process_image_pipeline(image: Image.Image) -> tuple[bytes, str, bytes, str,
     # Convert to RGB if needed
     image = convert_image_to_rgb(image)
 
-    # Remove white border
-    image = autocrop_white_border(image, threshold=WHITE_BORDER_THRESHOLD)
-
-    # Remove grey borders (left and right)
-    image = autocrop_grey_border(
-        image, border_color=None, tolerance=GREY_BORDER_TOLERANCE, sides="left"
-    )
-    image = autocrop_grey_border(
-        image, border_color=None, tolerance=GREY_BORDER_TOLERANCE, sides="right"
+    # Remove white border, then grey borders (left and right)
+    image = autocrop_borders(
+        image,
+        white_threshold=WHITE_BORDER_THRESHOLD,
+        grey_tolerance=GREY_BORDER_TOLERANCE,
     )
 
     # Convert processed image to bytes (PNG format)
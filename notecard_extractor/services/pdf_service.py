@@ -4,17 +4,19 @@ PDF processing service.
 Handles PDF extraction and image processing pipeline.
 """
 
-import hashlib
-from typing import List, Tuple
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from PIL import Image
 from notecard_extractor.utils.pdf_utils import read_pdf_from_bytes, extract_images_from_pdf_page
 from notecard_extractor.utils.image_utils import (
     convert_image_to_rgb,
     image_to_bytes,
-    create_thumbnail,
-    create_medium_image,
+    image_to_webp_bytes,
+    resize_image,
     calculate_image_hash,
 )
-from notecard_extractor.image_processing import autocrop_white_border, autocrop_grey_border
+from notecard_extractor.image_processing import autocrop_borders
 from notecard_extractor.config import (
     THUMBNAIL_MAX_SIZE,
     MEDIUM_IMAGE_MAX_SIZE,
@@ -23,72 +25,112 @@ from notecard_extractor.config import (
 )
 
 
+# Shared pool for page image processing. Pillow releases the GIL while
+# decoding, resizing and encoding, and the border scans run in NumPy, so
+# pages are processed in parallel; sharing the pool across requests bounds
+# the total number of worker threads.
+_page_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+
+def _encode_image_versions(image: Image.Image) -> Tuple[bytes, str, bytes]:
+    """
+    Encode one size of a page image as PNG (with its hash) and WebP.
+
+    Returns:
+        Tuple of (png_bytes, png_hash, webp_bytes)
+    """
+    image_bytes = image_to_bytes(image)
+    return image_bytes, calculate_image_hash(image_bytes), image_to_webp_bytes(image)
+
+
+def _process_page_image(
+    page_num: int, image: Image.Image
+) -> Optional[Tuple[int, bytes, str, bytes, str, bytes, str, bytes, bytes, bytes]]:
+    """
+    Process one page image (remove white and grey borders) and create its
+    thumbnail and medium versions, each as PNG and WebP.
+
+    Returns:
+        Result tuple as described in process_pdf_images, or None if processing failed
+    """
+    try:
+        # Convert to RGB if needed
+        image = convert_image_to_rgb(image)
+
+        # Remove white border, then grey borders (left and right)
+        image = autocrop_borders(
+            image,
+            white_threshold=WHITE_BORDER_THRESHOLD,
+            grey_tolerance=GREY_BORDER_TOLERANCE,
+        )
+
+        # Create medium and thumbnail versions, resizing once per size for
+        # both encodings (a size the image already fits is the image itself)
+        medium_image = resize_image(image, MEDIUM_IMAGE_MAX_SIZE)
+        thumbnail_image = resize_image(image, THUMBNAIL_MAX_SIZE)
+
+        # Encode PNG and WebP versions once here rather than on every request,
+        # reusing the full size encodings for versions that were not resized
+        image_bytes, image_hash, image_webp = _encode_image_versions(image)
+        if medium_image is image:
+            medium_bytes, medium_hash, medium_webp = image_bytes, image_hash, image_webp
+        else:
+            medium_bytes, medium_hash, medium_webp = _encode_image_versions(medium_image)
+        if thumbnail_image is image:
+            thumbnail_bytes, thumbnail_hash, thumbnail_webp = image_bytes, image_hash, image_webp
+        else:
+            thumbnail_bytes, thumbnail_hash, thumbnail_webp = _encode_image_versions(
+                thumbnail_image
+            )
+
+        return (
+            page_num,
+            image_bytes,
+            image_hash,
+            medium_bytes,
+            medium_hash,
+            thumbnail_bytes,
+            thumbnail_hash,
+            image_webp,
+            medium_webp,
+            thumbnail_webp,
+        )
+
+    except Exception:
+        # Skip this page if its image fails to process
+        return None
+
+
 def process_pdf_images(
     pdf_data: bytes,
-) -> List[Tuple[int, bytes, str, bytes, str, bytes, str]]:
+) -> List[Tuple[int, bytes, str, bytes, str, bytes, str, bytes, bytes, bytes]]:
     """
     Extract images from each page of a PDF, process them (remove white and grey borders),
-    and create thumbnail and medium versions.
+    and create thumbnail and medium versions, each as PNG and WebP.
+    Pages are processed concurrently on a shared thread pool.
 
     Returns:
         List of tuples, each containing (page_num, full_image_bytes, full_image_hash,
-        medium_image_bytes, medium_image_hash, thumbnail_bytes, thumbnail_hash).
+        medium_image_bytes, medium_image_hash, thumbnail_bytes, thumbnail_hash,
+        full_image_webp, medium_image_webp, thumbnail_webp), in page order.
         Returns empty list if no images found.
     """
-    results = []
     try:
         reader = read_pdf_from_bytes(pdf_data)
 
-        # Iterate through pages to extract one image per page
+        # pypdf is not thread-safe, so the first image of each page is read
+        # here and only the image processing runs on the pool
+        futures = []
         for page_num, page in enumerate(reader.pages):
             image = extract_images_from_pdf_page(page, page_num)
-            
+
             if image is None:
                 continue
 
-            try:
-                # Convert to RGB if needed
-                image = convert_image_to_rgb(image)
-
-                # Remove white border
-                image = autocrop_white_border(image, threshold=WHITE_BORDER_THRESHOLD)
-
-                # Remove grey borders (left and right)
-                image = autocrop_grey_border(
-                    image, border_color=None, tolerance=GREY_BORDER_TOLERANCE, sides="left"
-                )
-                image = autocrop_grey_border(
-                    image, border_color=None, tolerance=GREY_BORDER_TOLERANCE, sides="right"
-                )
-
-                # Convert processed image to bytes (PNG format)
-                image_bytes = image_to_bytes(image)
-                image_hash = calculate_image_hash(image_bytes)
-
-                # Create medium and thumbnail versions
-                medium_bytes, medium_hash = create_medium_image(image, MEDIUM_IMAGE_MAX_SIZE)
-                thumbnail_bytes, thumbnail_hash = create_thumbnail(image, THUMBNAIL_MAX_SIZE)
-
-                results.append(
-                    (
-                        page_num,
-                        image_bytes,
-                        image_hash,
-                        medium_bytes,
-                        medium_hash,
-                        thumbnail_bytes,
-                        thumbnail_hash,
-                    )
-                )
-
-                # Only extract the first image from each page
-                break
-
-            except Exception:
-                # Continue to next image if this one fails
-                continue
+            futures.append(_page_pool.submit(_process_page_image, page_num, image))
 
-        return results
+        results = [future.result() for future in futures]
+        return [result for result in results if result is not None]
 
     except Exception:
         # PDF reading or processing failed
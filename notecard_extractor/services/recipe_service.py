@@ -4,8 +4,10 @@ Recipe service.
 Handles recipe business logic and database operations.
 """
 
-from typing import List, Dict, Optional, Any
-from sqlalchemy import func
+import hashlib
+from datetime import datetime
+from typing import List, Dict, Optional, Any, Sequence, Tuple
+from sqlalchemy import func, insert, update
 from sqlmodel import Session
 from notecard_extractor.database import (
     Recipe,
@@ -17,6 +19,67 @@ from notecard_extractor.database import (
 )
 
 
+def _version_tag(*parts: Any) -> str:
+    """Hash version key parts into a short ETag value."""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def touch_recipe(session: Session, recipe_id: int) -> bool:
+    """
+    Mark a recipe as changed so cached list and detail responses revalidate.
+    Doubles as an existence check that loads no recipe columns.
+    
+    Args:
+        session: Database session
+        recipe_id: Recipe ID
+        
+    Returns:
+        True if the recipe exists, False otherwise
+    """
+    result = session.execute(
+        update(Recipe)
+        .where(Recipe.id == recipe_id)
+        .values(updated_at=datetime.utcnow())
+    )
+    return result.rowcount == 1
+
+
+def get_recipe_list_version(session: Session) -> str:
+    """
+    Get a version tag for the recipe list without loading any recipes.
+    Changes whenever a recipe is added or touched.
+    
+    Args:
+        session: Database session
+        
+    Returns:
+        Version tag suitable for an ETag
+    """
+    latest, count = session.query(
+        func.max(Recipe.updated_at), func.count(Recipe.id)
+    ).one()
+    return _version_tag("recipes", latest, count)
+
+
+def get_recipe_version(session: Session, recipe_id: int) -> Optional[str]:
+    """
+    Get a version tag for a recipe's details without loading the recipe.
+    
+    Args:
+        session: Database session
+        recipe_id: Recipe ID
+        
+    Returns:
+        Version tag suitable for an ETag, or None if recipe not found
+    """
+    row = (
+        session.query(Recipe.updated_at).filter(Recipe.id == recipe_id).one_or_none()
+    )
+    if row is None:
+        return None
+    return _version_tag("recipe", recipe_id, row.updated_at)
+
+
 def get_recipe_list(session: Session) -> List[Dict[str, Any]]:
     """
     Get a list of all recipes from the database.
@@ -28,33 +91,32 @@ def get_recipe_list(session: Session) -> List[Dict[str, Any]]:
     Returns:
         List of recipe dictionaries
     """
+    # PDF sizes are computed by the database so the deferred PDF column is
+    # never loaded
     recipes = (
-        session.query(Recipe).order_by(Recipe.pdf_upload_timestamp.desc()).all()
+        session.query(Recipe, func.length(Recipe.original_pdf_data))
+        .order_by(Recipe.pdf_upload_timestamp.desc())
+        .all()
     )
 
+    # Load the page 1 rotations and the tags of every recipe with one query
+    # each, instead of two queries per recipe
+    rotations = dict(
+        session.query(RecipeImage.recipe_id, RecipeImage.rotation)
+        .filter(RecipeImage.pdf_page_number == 0)
+        .all()
+    )
+    tags_by_recipe = get_all_recipe_tags(session)
+
     results = []
-    for idx, recipe in enumerate(recipes, start=1):
-        pdf_size = (
-            len(recipe.original_pdf_data) if recipe.original_pdf_data else 0
-        )
+    for idx, (recipe, pdf_size) in enumerate(recipes, start=1):
+        pdf_size = pdf_size or 0
         upload_time = (
             recipe.pdf_upload_timestamp.isoformat()
             if recipe.pdf_upload_timestamp
             else None
         )
 
-        # Get rotation from page 1 image (pdf_page_number = 0)
-        recipe_image = (
-            session.query(RecipeImage)
-            .filter(RecipeImage.recipe_id == recipe.id)
-            .filter(RecipeImage.pdf_page_number == 0)
-            .first()
-        )
-        rotation = recipe_image.rotation if recipe_image else 0
-
-        # Get tags for this recipe
-        tags_list = get_recipe_tags(session, recipe.id)
-
         results.append(
             {
                 "id": recipe.id,
@@ -63,9 +125,9 @@ def get_recipe_list(session: Session) -> List[Dict[str, Any]]:
                 "pdf_filename": recipe.pdf_filename or "Unknown",
                 "title": recipe.title,
                 "pdf_size": pdf_size,
-                "rotation": rotation,
+                "rotation": rotations.get(recipe.id) or 0,
                 "state": recipe.state.value if recipe.state else "not_started",
-                "tags": tags_list,
+                "tags": tags_by_recipe.get(recipe.id, []),
             }
         )
 
@@ -83,30 +145,38 @@ def get_recipe_details(session: Session, recipe_id: int) -> Optional[Dict[str, A
     Returns:
         Recipe dictionary or None if not found
     """
-    recipe = session.get(Recipe, recipe_id)
+    row = (
+        session.query(Recipe, func.length(Recipe.original_pdf_data))
+        .filter(Recipe.id == recipe_id)
+        .one_or_none()
+    )
 
-    if not recipe:
+    if not row:
         return None
+    recipe, pdf_size = row
 
-    # Get all RecipeImage entries for this recipe
+    # Get all RecipeImage entries for this recipe. Blob sizes are computed
+    # by the database so the deferred image columns are never loaded.
     recipe_images = (
-        session.query(RecipeImage)
+        session.query(
+            RecipeImage,
+            func.length(RecipeImage.cropped_image_data),
+            func.length(RecipeImage.medium_image_data),
+            func.length(RecipeImage.thumbnail_data),
+        )
         .filter(RecipeImage.recipe_id == recipe_id)
         .order_by(RecipeImage.pdf_page_number)
         .all()
     )
 
-    # Get page 1 image (pdf_page_number = 0) for main image data
-    recipe_image_page1 = (
-        session.query(RecipeImage)
-        .filter(RecipeImage.recipe_id == recipe_id)
-        .filter(RecipeImage.pdf_page_number == 0)
-        .first()
-    )
-
     # Get all DishImage entries for this recipe
     dish_images = (
-        session.query(DishImage)
+        session.query(
+            DishImage,
+            func.length(DishImage.image_data),
+            func.length(DishImage.medium_image_data),
+            func.length(DishImage.thumbnail_data),
+        )
         .filter(DishImage.recipe_id == recipe_id)
         .order_by(DishImage.image_number)
         .all()
@@ -117,44 +187,40 @@ def get_recipe_details(session: Session, recipe_id: int) -> Optional[Dict[str, A
 
     # Build list of all pages
     pages = []
-    for img in recipe_images:
-        pages.append(
-            {
-                "pdf_page_number": img.pdf_page_number,
-                "rotation": img.rotation,
-                "unneeded": img.unneeded,
-                "cropped_image_sha256": img.cropped_image_sha256,
-                "cropped_image_size": len(img.cropped_image_data)
-                if img.cropped_image_data
-                else 0,
-                "medium_image_sha256": img.medium_image_sha256,
-                "medium_image_size": len(img.medium_image_data)
-                if img.medium_image_data
-                else 0,
-                "thumbnail_sha256": img.thumbnail_sha256,
-                "thumbnail_size": len(img.thumbnail_data)
-                if img.thumbnail_data
-                else 0,
-            }
-        )
+    recipe_image_page1 = None
+    page1 = {}
+    for img, cropped_size, medium_size, thumbnail_size in recipe_images:
+        page = {
+            "pdf_page_number": img.pdf_page_number,
+            "rotation": img.rotation,
+            "unneeded": img.unneeded,
+            "cropped_image_sha256": img.cropped_image_sha256,
+            "cropped_image_size": cropped_size or 0,
+            "medium_image_sha256": img.medium_image_sha256,
+            "medium_image_size": medium_size or 0,
+            "thumbnail_sha256": img.thumbnail_sha256,
+            "thumbnail_size": thumbnail_size or 0,
+        }
+        pages.append(page)
+
+        # Page 1 image (pdf_page_number = 0) provides the main image data
+        if img.pdf_page_number == 0 and recipe_image_page1 is None:
+            recipe_image_page1 = img
+            page1 = page
 
     # Build list of all dish images
     dish_images_list = []
-    for img in dish_images:
+    for img, image_size, medium_size, thumbnail_size in dish_images:
         dish_images_list.append(
             {
                 "image_number": img.image_number,
                 "rotation": img.rotation,
                 "image_sha256": img.image_sha256,
-                "image_size": len(img.image_data) if img.image_data else 0,
+                "image_size": image_size or 0,
                 "medium_image_sha256": img.medium_image_sha256,
-                "medium_image_size": len(img.medium_image_data)
-                if img.medium_image_data
-                else 0,
+                "medium_image_size": medium_size or 0,
                 "thumbnail_sha256": img.thumbnail_sha256,
-                "thumbnail_size": len(img.thumbnail_data)
-                if img.thumbnail_data
-                else 0,
+                "thumbnail_size": thumbnail_size or 0,
             }
         )
 
@@ -168,27 +234,19 @@ def get_recipe_details(session: Session, recipe_id: int) -> Optional[Dict[str, A
             else None
         ),
         "original_pdf_sha256": recipe.original_pdf_sha256,
-        "original_pdf_size": len(recipe.original_pdf_data)
-        if recipe.original_pdf_data
-        else 0,
+        "original_pdf_size": pdf_size or 0,
         "cropped_image_sha256": recipe_image_page1.cropped_image_sha256
         if recipe_image_page1
         else None,
-        "cropped_image_size": len(recipe_image_page1.cropped_image_data)
-        if recipe_image_page1 and recipe_image_page1.cropped_image_data
-        else 0,
+        "cropped_image_size": page1.get("cropped_image_size", 0),
         "medium_image_sha256": recipe_image_page1.medium_image_sha256
         if recipe_image_page1
         else None,
-        "medium_image_size": len(recipe_image_page1.medium_image_data)
-        if recipe_image_page1 and recipe_image_page1.medium_image_data
-        else 0,
+        "medium_image_size": page1.get("medium_image_size", 0),
         "thumbnail_sha256": recipe_image_page1.thumbnail_sha256
         if recipe_image_page1
         else None,
-        "thumbnail_size": len(recipe_image_page1.thumbnail_data)
-        if recipe_image_page1 and recipe_image_page1.thumbnail_data
-        else 0,
+        "thumbnail_size": page1.get("thumbnail_size", 0),
         "rotation": recipe_image_page1.rotation if recipe_image_page1 else 0,
         "state": recipe.state.value if recipe.state else "not_started",
         "title": recipe.title,
@@ -220,7 +278,17 @@ def update_recipe_fields(session: Session, recipe_id: int, data: Dict[str, Any])
         
     Returns:
         True if recipe was found and updated, False otherwise
+        
+    Raises:
+        ValueError: If the state is not a valid RecipeState
     """
+    # Validate the state before touching the database
+    if "state" in data:
+        try:
+            state = RecipeState(data["state"])
+        except ValueError:
+            raise ValueError(f"Invalid state: {data['state']}") from None
+
     recipe = session.get(Recipe, recipe_id)
 
     if not recipe:
@@ -248,12 +316,123 @@ def update_recipe_fields(session: Session, recipe_id: int, data: Dict[str, Any])
     if "notes" in data:
         recipe.notes = data["notes"] if data["notes"] else None
     if "state" in data:
-        recipe.state = RecipeState(data["state"])
+        recipe.state = state
+    recipe.updated_at = datetime.utcnow()
 
     session.add(recipe)
     return True
 
 
+def add_recipe_images(
+    session: Session,
+    recipe_id: int,
+    image_results: Sequence[Tuple[int, bytes, str, bytes, str, bytes, str, bytes, bytes, bytes]],
+) -> int:
+    """
+    Insert the processed page images of a recipe.
+    All pages go to the database in one executemany INSERT instead of one
+    ORM add and flush per page.
+    
+    Args:
+        session: Database session
+        recipe_id: Recipe ID
+        image_results: Page tuples as returned by process_pdf_images
+        
+    Returns:
+        Number of page images inserted
+    """
+    if not image_results:
+        return 0
+
+    session.execute(
+        insert(RecipeImage),
+        [
+            {
+                "recipe_id": recipe_id,
+                "pdf_page_number": page_num,
+                "rotation": 0,
+                "cropped_image_data": cropped_image_data,
+                "cropped_image_sha256": cropped_image_hash,
+                "medium_image_data": medium_image_data,
+                "medium_image_sha256": medium_image_hash,
+                "thumbnail_data": thumbnail_data,
+                "thumbnail_sha256": thumbnail_hash,
+                "cropped_image_webp": cropped_image_webp,
+                "medium_image_webp": medium_image_webp,
+                "thumbnail_webp": thumbnail_webp,
+                "unneeded": False,
+            }
+            for (
+                page_num,
+                cropped_image_data,
+                cropped_image_hash,
+                medium_image_data,
+                medium_image_hash,
+                thumbnail_data,
+                thumbnail_hash,
+                cropped_image_webp,
+                medium_image_webp,
+                thumbnail_webp,
+            ) in image_results
+        ],
+    )
+    return len(image_results)
+
+
+def update_recipe_image(
+    session: Session, recipe_id: int, page_number: int, **values: Any
+) -> bool:
+    """
+    Update columns of a recipe page image by its (recipe_id, pdf_page_number) key.
+    Issues a single UPDATE on the unique index instead of loading the row first.
+    
+    Args:
+        session: Database session
+        recipe_id: Recipe ID
+        page_number: PDF page number (0-based)
+        values: Column values to set
+        
+    Returns:
+        True if the image was found and updated, False otherwise
+    """
+    result = session.execute(
+        update(RecipeImage)
+        .where(
+            RecipeImage.recipe_id == recipe_id,
+            RecipeImage.pdf_page_number == page_number,
+        )
+        .values(**values)
+    )
+    return result.rowcount == 1
+
+
+def update_dish_image(
+    session: Session, recipe_id: int, image_number: int, **values: Any
+) -> bool:
+    """
+    Update columns of a dish image by its (recipe_id, image_number) key.
+    Issues a single UPDATE on the unique index instead of loading the row first.
+    
+    Args:
+        session: Database session
+        recipe_id: Recipe ID
+        image_number: Dish image number
+        values: Column values to set
+        
+    Returns:
+        True if the image was found and updated, False otherwise
+    """
+    result = session.execute(
+        update(DishImage)
+        .where(
+            DishImage.recipe_id == recipe_id,
+            DishImage.image_number == image_number,
+        )
+        .values(**values)
+    )
+    return result.rowcount == 1
+
+
 def get_recipe_tags(session: Session, recipe_id: int) -> List[Dict[str, Any]]:
     """
     Get all tags for a recipe.
@@ -283,6 +462,35 @@ def get_recipe_tags(session: Session, recipe_id: int) -> List[Dict[str, Any]]:
     return tags_list
 
 
+def get_all_recipe_tags(session: Session) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Get the tags of every recipe with a single query.
+    
+    Args:
+        session: Database session
+        
+    Returns:
+        Dictionary mapping recipe ID to its list of tag dictionaries
+        (recipes without tags are omitted)
+    """
+    recipe_tags = (
+        session.query(RecipeTag.id, RecipeTag.recipe_id, RecipeTagList.id, RecipeTagList.tag_name)
+        .join(RecipeTagList, RecipeTag.tag_id == RecipeTagList.id)
+        .order_by(RecipeTag.recipe_id, RecipeTag.tag_id)
+        .all()
+    )
+    
+    tags_by_recipe = {}
+    for recipe_tag_id, recipe_id, tag_id, tag_name in recipe_tags:
+        tags_by_recipe.setdefault(recipe_id, []).append({
+            "id": tag_id,
+            "tag_name": tag_name,
+            "recipe_tag_id": recipe_tag_id
+        })
+    
+    return tags_by_recipe
+
+
 def add_tag_to_recipe(session: Session, recipe_id: int, tag_name: str) -> Optional[Dict[str, Any]]:
     """
     Add a tag to a recipe.
@@ -328,6 +536,7 @@ def add_tag_to_recipe(session: Session, recipe_id: int, tag_name: str) -> Option
     # Create the link
     recipe_tag = RecipeTag(recipe_id=recipe_id, tag_id=tag_list.id)
     session.add(recipe_tag)
+    recipe.updated_at = datetime.utcnow()
     session.flush()
 
     return {
@@ -361,6 +570,7 @@ def remove_tag_from_recipe(session: Session, recipe_id: int, recipe_tag_id: int)
         return False
 
     session.delete(recipe_tag)
+    touch_recipe(session, recipe_id)
     return True
 
 
@@ -375,15 +585,17 @@ def get_all_tags_with_counts(session: Session) -> List[Dict[str, Any]]:
     Returns:
         List of tag dictionaries with counts
     """
+    # The inner join only yields tags with at least one recipe, and counting
+    # rows rather than recipe_id values (never NULL) lets each tag's links
+    # be counted from the tag_id index without reading the junction rows
     tags_with_counts = (
         session.query(
             RecipeTagList.id,
             RecipeTagList.tag_name,
-            func.count(RecipeTag.recipe_id).label('recipe_count')
+            func.count().label('recipe_count')
         )
         .join(RecipeTag, RecipeTagList.id == RecipeTag.tag_id)
         .group_by(RecipeTagList.id, RecipeTagList.tag_name)
-        .having(func.count(RecipeTag.recipe_id) > 0)
         .order_by(RecipeTagList.tag_name)
         .all()
     )
@@ -8,8 +8,12 @@ from .image_utils import (
     create_medium_image,
     convert_image_to_rgb,
     image_to_bytes,
+    image_to_webp_bytes,
+)
+from .pdf_utils import (
+    extract_image_and_data_from_pdf_page,
+    extract_images_from_pdf_page,
 )
-from .pdf_utils import extract_images_from_pdf_page
 from .cache_utils import get_cache_headers, check_cache_etag
 from .db_utils import get_db_session
 
@@ -19,6 +23,8 @@ __all__ = [
     "create_medium_image",
     "convert_image_to_rgb",
     "image_to_bytes",
+    "image_to_webp_bytes",
+    "extract_image_and_data_from_pdf_page",
     "extract_images_from_pdf_page",
     "get_cache_headers",
     "check_cache_etag",
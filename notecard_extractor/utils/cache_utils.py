@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """
 HTTP cache utility functions.
-Handles cache headers and ETag validation.
+Handles cache headers, ETag validation and the in-process image cache.
 """
 
+import threading
+from collections import OrderedDict
 from typing import Optional
+from notecard_extractor.config import IMAGE_CACHE_MAX_BYTES
 
 
 def get_cache_headers(image_hash: Optional[str] = None) -> dict:
@@ -28,6 +31,23 @@ def get_cache_headers(image_hash: Optional[str] = None) -> dict:
     return headers
 
 
+def get_revalidate_headers(etag: str) -> dict:
+    """
+    Generate HTTP caching headers for data that can change.
+    Clients may keep the response but must revalidate it with the ETag.
+    
+    Args:
+        etag: Version tag of the response data
+        
+    Returns:
+        Dictionary of HTTP headers
+    """
+    return {
+        "Cache-Control": "no-cache",
+        "ETag": f'"{etag}"',
+    }
+
+
 def check_cache_etag(request_etag: Optional[str], image_hash: Optional[str]) -> bool:
     """
     Check if the client's ETag matches the image hash.
@@ -46,3 +66,59 @@ def check_cache_etag(request_etag: Optional[str], image_hash: Optional[str]) ->
     # Remove quotes from ETag if present
     request_etag = request_etag.strip('"')
     return request_etag == image_hash
+
+
+class ImageBlobCache:
+    """
+    In-process LRU cache of image bytes keyed by their SHA256 hash.
+    Stored images never change for a given hash, so entries never go stale;
+    the least recently used entries are evicted once the total size exceeds
+    the byte budget.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, image_hash: str) -> Optional[bytes]:
+        """
+        Get cached image bytes.
+        
+        Args:
+            image_hash: SHA256 hash of the image
+            
+        Returns:
+            Image bytes or None if not cached
+        """
+        with self._lock:
+            data = self._entries.get(image_hash)
+            if data is not None:
+                self._entries.move_to_end(image_hash)
+            return data
+
+    def put(self, image_hash: str, data: bytes) -> None:
+        """
+        Add image bytes to the cache, evicting old entries as needed.
+        
+        Args:
+            image_hash: SHA256 hash of the image
+            data: Image bytes
+        """
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            if image_hash in self._entries:
+                self._entries.move_to_end(image_hash)
+                return
+            self._entries[image_hash] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+# Shared cache used by the image handlers
+image_blob_cache = ImageBlobCache(IMAGE_CACHE_MAX_BYTES)
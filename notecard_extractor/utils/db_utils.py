@@ -6,8 +6,12 @@ Handles database session management and common operations.
 
 from contextlib import contextmanager
 from typing import Optional
+from sqlalchemy import inspect, text
 from sqlalchemy.engine import Engine
-from sqlmodel import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import Session, SQLModel
+from notecard_extractor.config import SQLITE_PAGE_SIZE
 
 
 # Global database engine (will be set by web_gui)
@@ -35,6 +39,52 @@ def get_db_engine() -> Optional[Engine]:
     return _db_engine
 
 
+def set_sqlite_page_size(dbapi_connection, connection_record) -> None:
+    """
+    Set the page size used when a new SQLite database file is created.
+    PDFs and images are stored as multi-megabyte BLOBs, which SQLite spills
+    into chains of overflow pages; larger pages make those chains several
+    times shorter to write and read. Existing databases keep their page
+    size, since the pragma only applies before the first table is created.
+    Register with event.listen(engine, "connect", set_sqlite_page_size).
+    
+    Args:
+        dbapi_connection: Raw DBAPI connection being opened
+        connection_record: Connection pool record (unused)
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA page_size = {SQLITE_PAGE_SIZE}")
+    cursor.close()
+
+
+def disable_pysqlite_transactions(dbapi_connection, connection_record) -> None:
+    """
+    Stop pysqlite from opening and committing transactions on its own.
+    pysqlite emits no BEGIN before a SAVEPOINT, so releasing an outermost
+    savepoint commits. With its transaction handling off and
+    begin_sqlite_transaction emitting BEGIN instead, savepoints nest inside
+    one transaction that is committed once.
+    Register with event.listen(engine, "connect", disable_pysqlite_transactions).
+    
+    Args:
+        dbapi_connection: Raw DBAPI connection being opened
+        connection_record: Connection pool record (unused)
+    """
+    dbapi_connection.isolation_level = None
+
+
+def begin_sqlite_transaction(connection) -> None:
+    """
+    Emit BEGIN when SQLAlchemy starts a transaction on a SQLite connection.
+    Register with event.listen(engine, "begin", begin_sqlite_transaction),
+    together with disable_pysqlite_transactions.
+    
+    Args:
+        connection: SQLAlchemy connection starting a transaction
+    """
+    connection.exec_driver_sql("BEGIN")
+
+
 @contextmanager
 def get_db_session():
     """
@@ -51,3 +101,51 @@ def get_db_session():
     
     with Session(_db_engine) as session:
         yield session
+
+
+def upgrade_schema(engine: Engine) -> list[str]:
+    """
+    Bring an existing database up to date with the models.
+    create_all() only creates missing tables, so columns and indexes added
+    to tables that already exist are created here. A column can only be
+    added if it is nullable or has a server default, since existing rows
+    need a value for it.
+    
+    Args:
+        engine: SQLAlchemy engine
+        
+    Returns:
+        Names of columns ("table.column") and indexes that could not be
+        created (e.g. NOT NULL columns without a server default, or unique
+        indexes over rows that already contain duplicates)
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    skipped = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                # ALTER TABLE would fail: existing rows have no value for it
+                skipped.append(f"{table.name}.{column.name}")
+                continue
+            column_spec = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {column_spec}"
+                    )
+                )
+
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except IntegrityError:
+                skipped.append(index.name)
+    return skipped
@@ -6,8 +6,10 @@ Handles image resizing, hashing, format conversion, and byte conversion.
 
 import hashlib
 import io
+import math
 from PIL import Image
-from typing import Tuple
+from typing import Optional, Tuple
+from notecard_extractor.config import WEBP_QUALITY
 
 
 def calculate_image_hash(image_bytes: bytes) -> str:
@@ -23,6 +25,49 @@ def calculate_image_hash(image_bytes: bytes) -> str:
     return hashlib.sha256(image_bytes).hexdigest()
 
 
+def _fit_size(size: Tuple[int, int], max_size: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    Calculate the largest size within max_size that keeps the aspect ratio
+    of size, rounded the same way as PIL's Image.thumbnail().
+    
+    Args:
+        size: Current size tuple (width, height)
+        max_size: Maximum size tuple (width, height)
+        
+    Returns:
+        Fitted size tuple (width, height)
+    """
+    x, y = max_size
+    aspect = size[0] / size[1]
+    if x / y >= aspect:
+        candidates = (math.floor(y * aspect), math.ceil(y * aspect))
+        x = max(min(candidates, key=lambda n: abs(aspect - n / y)), 1)
+    else:
+        candidates = (math.floor(x / aspect), math.ceil(x / aspect))
+        y = max(min(candidates, key=lambda n: 0 if n == 0 else abs(aspect - x / n)), 1)
+    return x, y
+
+
+def resize_image(image: Image.Image, max_size: Tuple[int, int]) -> Image.Image:
+    """
+    Resize an image to fit within a maximum size, keeping its aspect ratio.
+    
+    Args:
+        image: PIL Image to resize
+        max_size: Maximum size tuple (width, height)
+        
+    Returns:
+        Resized copy of the image, or the image itself if it already fits
+    """
+    if image.width <= max_size[0] and image.height <= max_size[1]:
+        return image
+    # Same size and filter as Image.thumbnail(), but resized straight from
+    # the source instead of from a full resolution copy of it
+    return image.resize(
+        _fit_size(image.size, max_size), Image.Resampling.LANCZOS, reducing_gap=2.0
+    )
+
+
 def create_thumbnail(image: Image.Image, max_size: Tuple[int, int] = (200, 200)) -> Tuple[bytes, str]:
     """
     Create a thumbnail version of an image.
@@ -34,8 +79,7 @@ def create_thumbnail(image: Image.Image, max_size: Tuple[int, int] = (200, 200))
     Returns:
         Tuple of (thumbnail_bytes, thumbnail_hash)
     """
-    thumbnail_image = image.copy()
-    thumbnail_image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    thumbnail_image = resize_image(image, max_size)
     thumbnail_bytes = image_to_bytes(thumbnail_image)
     thumbnail_hash = calculate_image_hash(thumbnail_bytes)
     return thumbnail_bytes, thumbnail_hash
@@ -52,8 +96,7 @@ def create_medium_image(image: Image.Image, max_size: Tuple[int, int] = (800, 80
     Returns:
         Tuple of (medium_bytes, medium_hash)
     """
-    medium_image = image.copy()
-    medium_image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    medium_image = resize_image(image, max_size)
     medium_bytes = image_to_bytes(medium_image)
     medium_hash = calculate_image_hash(medium_bytes)
     return medium_bytes, medium_hash
@@ -69,14 +112,17 @@ def convert_image_to_rgb(image: Image.Image) -> Image.Image:
     Returns:
         RGB PIL Image
     """
-    if image.mode in ("RGBA", "LA", "P"):
+    if image.mode == "P" and "transparency" not in image.info:
+        # Opaque palette images have no alpha to flatten
+        image = image.convert("RGB")
+    elif image.mode in ("RGBA", "LA", "P"):
         # Create white background for transparent images
         rgb_img = Image.new("RGB", image.size, (255, 255, 255))
         if image.mode == "P":
             image = image.convert("RGBA")
         rgb_img.paste(
             image,
-            mask=image.split()[-1] if image.mode == "RGBA" else None,
+            mask=image.getchannel("A") if image.mode == "RGBA" else None,
         )
         return rgb_img
     elif image.mode != "RGB":
@@ -98,3 +144,23 @@ def image_to_bytes(image: Image.Image, format: str = "PNG") -> bytes:
     image_bytes = io.BytesIO()
     image.save(image_bytes, format=format)
     return image_bytes.getvalue()
+
+
+def image_to_webp_bytes(
+    image: Image.Image, max_size: Optional[Tuple[int, int]] = None
+) -> bytes:
+    """
+    Encode a PIL Image as lossy WebP, optionally resized first.
+    
+    Args:
+        image: PIL Image to convert
+        max_size: Optional maximum size tuple (width, height)
+        
+    Returns:
+        WebP image data as bytes
+    """
+    if max_size:
+        image = resize_image(image, max_size)
+    image_bytes = io.BytesIO()
+    image.save(image_bytes, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return image_bytes.getvalue()
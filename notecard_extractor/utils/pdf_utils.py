@@ -4,31 +4,114 @@ PDF utility functions.
 Handles PDF reading and image extraction from PDF pages.
 """
 
+import hashlib
 import io
-from typing import Optional
+from typing import BinaryIO, Optional, Tuple
 from pypdf import PdfReader
 from PIL import Image
 
 
-def extract_images_from_pdf_page(page, page_num: int) -> Optional[Image.Image]:
+# Pillow modes of JPEG image streams in color spaces that pypdf passes
+# through unchanged (apart from re-encoding the JPEG)
+JPEG_PASSTHROUGH_MODES = {"/DeviceRGB": "RGB", "/DeviceGray": "L"}
+
+
+def _embedded_jpeg(page, image_id) -> Optional[Tuple[bytes, str]]:
     """
-    Extract the first image from a PDF page.
+    Read an image XObject's stream directly if it is a plain JPEG file.
+    pypdf decodes every image and encodes it again before returning it; for
+    a JPEG with no masks or decode arrays the stream already is the image.
+    
+    Args:
+        page: PyPDF page object
+        image_id: Image id from page.images.keys()
+        
+    Returns:
+        Tuple of (JPEG data, expected Pillow mode), or None if the image needs
+        pypdf's conversion
+    """
+    if not isinstance(image_id, str) or image_id.startswith("~"):
+        # Images inside form XObjects or inline in the content stream
+        return None
+    try:
+        xobject = page["/Resources"]["/XObject"][image_id]
+        filters = xobject.get("/Filter")
+        if isinstance(filters, list) and len(filters) == 1:
+            filters = filters[0]
+        if filters != "/DCTDecode" or xobject.get("/BitsPerComponent", 8) != 8:
+            return None
+        if any(key in xobject for key in ("/Decode", "/SMask", "/Mask", "/ImageMask")):
+            return None
+        mode = JPEG_PASSTHROUGH_MODES.get(xobject.get("/ColorSpace"))
+        if mode is None:
+            return None
+        return xobject.get_data(), mode
+    except Exception:
+        return None
+
+
+def read_embedded_jpeg(page, image_id) -> Optional[Tuple[Image.Image, bytes]]:
+    """
+    Read an image's JPEG stream as-is when it needs no conversion.
+    The stream is opened lazily (only the JPEG header is parsed) to check
+    that it decodes to the mode pypdf would give the image.
+    
+    Args:
+        page: PyPDF page object
+        image_id: Image id from page.images.keys()
+        
+    Returns:
+        Tuple of (PIL Image, JPEG data), or None if the image must be read
+        through page.images
+    """
+    embedded = _embedded_jpeg(page, image_id)
+    if embedded is None:
+        return None
+    image_data, mode = embedded
+    try:
+        image = Image.open(io.BytesIO(image_data))
+    except Exception:
+        return None
+    if image.mode != mode:
+        image.close()
+        return None
+    return image, image_data
+
+
+def extract_image_and_data_from_pdf_page(
+    page, page_num: int
+) -> Optional[Tuple[Image.Image, bytes]]:
+    """
+    Extract the first image from a PDF page along with its encoded data.
+    The data is the file the image was read from: the embedded stream for
+    plain JPEG images, otherwise the file pypdf built for the image (e.g. PNG
+    for Flate-compressed images), so it can be written out as-is when its
+    format matches the one wanted.
     
     Args:
         page: PyPDF page object
         page_num: Page number (0-indexed) for error reporting
         
     Returns:
-        PIL Image if found, None otherwise
+        Tuple of (PIL Image, image data) if found, None otherwise
     """
-    for image_file_object in page.images:
+    # Resolve the image ids once; iterating page.images looks them up again
+    # for every image
+    images = page.images
+    for image_id in images.keys():
         try:
-            # Get image data
-            image_data = image_file_object.data
-            
-            # Open image with PIL
-            image = Image.open(io.BytesIO(image_data))
-            return image
+            embedded = read_embedded_jpeg(page, image_id)
+            if embedded is not None:
+                return embedded
+
+            # pypdf has already opened the image over its data, so use that
+            # instead of parsing the same bytes again
+            image_file_object = images[image_id]
+            image = image_file_object.image
+            if image is None:
+                # pypdf could not load this image
+                continue
+            return image, image_file_object.data
             
         except Exception:
             # Continue to next image if this one fails
@@ -37,6 +120,21 @@ def extract_images_from_pdf_page(page, page_num: int) -> Optional[Image.Image]:
     return None
 
 
+def extract_images_from_pdf_page(page, page_num: int) -> Optional[Image.Image]:
+    """
+    Extract the first image from a PDF page.
+    
+    Args:
+        page: PyPDF page object
+        page_num: Page number (0-indexed) for error reporting
+        
+    Returns:
+        PIL Image if found, None otherwise
+    """
+    extracted = extract_image_and_data_from_pdf_page(page, page_num)
+    return None if extracted is None else extracted[0]
+
+
 def read_pdf_from_bytes(pdf_data: bytes) -> PdfReader:
     """
     Read PDF from bytes and return PdfReader object.
@@ -49,3 +147,25 @@ def read_pdf_from_bytes(pdf_data: bytes) -> PdfReader:
     """
     pdf_stream = io.BytesIO(pdf_data)
     return PdfReader(pdf_stream)
+
+
+def read_and_hash_pdf(stream: BinaryIO) -> Tuple[bytes, str]:
+    """
+    Read a PDF stream and calculate its SHA256 hash.
+    The whole body is hashed with a single call, so OpenSSL's SHA-256
+    routine (SHA extensions where the CPU has them) runs over one
+    contiguous buffer instead of being re-entered per chunk.
+    
+    Args:
+        stream: Binary file-like object positioned at the start of the PDF
+        
+    Returns:
+        Tuple of (PDF data, SHA256 hex digest)
+    """
+    if isinstance(stream, io.BytesIO) and stream.tell() == 0:
+        # Small uploads are already held in memory; getvalue() shares the
+        # buffer without copying
+        pdf_data = stream.getvalue()
+    else:
+        pdf_data = stream.read()
+    return pdf_data, hashlib.sha256(pdf_data).hexdigest()
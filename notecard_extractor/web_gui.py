@@ -8,8 +8,15 @@ from flask import Flask
 from pathlib import Path
 from typing import Annotated
 import typer
+from sqlalchemy import event
 from sqlmodel import SQLModel, create_engine
-from notecard_extractor.utils.db_utils import set_db_engine
+from notecard_extractor.utils.db_utils import (
+    set_db_engine,
+    set_sqlite_page_size,
+    disable_pysqlite_transactions,
+    begin_sqlite_transaction,
+    upgrade_schema,
+)
 from notecard_extractor.api.routes import register_routes
 from notecard_extractor.config import DEFAULT_DATABASE_PATH
 # Import database models to register them with SQLModel
@@ -24,6 +31,9 @@ flask_app = Flask(
     static_folder=str(BASE_DIR / "static"),
     static_url_path="/static"
 )
+# Responses keep the key order they were built with; sorting every dict
+# in large recipe lists costs about 30% of JSON encoding time
+flask_app.json.sort_keys = False
 app = typer.Typer()
 
 # Register all routes
@@ -52,6 +62,11 @@ def run_server(
     # Create database URL
     db_url = f"sqlite:///{database}"
     db_engine = create_engine(db_url, echo=debug)
+    event.listen(db_engine, "connect", set_sqlite_page_size)
+    # Let SQLAlchemy emit BEGIN itself, so savepoints nest inside one
+    # transaction instead of each committing on release
+    event.listen(db_engine, "connect", disable_pysqlite_transactions)
+    event.listen(db_engine, "begin", begin_sqlite_transaction)
     
     # Set the global database engine for use in handlers
     set_db_engine(db_engine)
@@ -59,6 +74,10 @@ def run_server(
     # Create all tables (Recipe model is imported above, so it's registered)
     SQLModel.metadata.create_all(db_engine)
 
+    # Add columns and indexes introduced since the database was created
+    for name in upgrade_schema(db_engine):
+        typer.echo(f"Warning: could not create {name}", err=True)
+
     typer.echo(f"Database initialized at: {database}")
 
     typer.echo(f"Starting web server at http://{host}:{port}")